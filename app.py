@@ -1,33 +1,269 @@
 
 import os
 import logging
-from flask import Flask, render_template, request, jsonify
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, g, got_request_exception, render_template, request, jsonify
 from werkzeug.utils import secure_filename
-import cv2
 
 from cistercian_renderer import (
-    number_to_cistercian_image,
+    IMAGE_FORMATS,
+    RENDERER_VERSION,
+    GlyphAtlas,
+    cached_number_to_cistercian_image,
+    cached_number_to_cistercian_with_segments,
+    configure_render_cache,
     decode_base64_image,
-    number_to_cistercian_with_segments,
+    decode_image_bytes,
+    encode_image,
+    encode_image_to_png,
+    make_render_options,
+    number_to_cistercian_svg,
+    profile_encodings,
+    render_cache,
+    render_cistercian_image,
+    render_cistercian_with_segments,
 )
-from cistercian_recognition import recognize_cistercian_numeral
+from cistercian_recognition import ENGINES, recognize_cistercian_numeral
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from recognition_service import get_recognition_executor
+from stage_timing import NULL_TIMER, StageTimer
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "default_secret_key_for_development")
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 UPLOAD_FOLDER = "static/uploaded_images"
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
+RESPONSE_FORMATS = {"json"} | set(IMAGE_FORMATS)
+ACCEPTED_MIMETYPES = {"application/json": "json", "image/png": "png", "image/webp": "webp"}
+RENDER_OPTION_FIELDS = ("width", "height", "thickness", "scale", "margin")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["MAX_CONTENT_LENGTH"] = 5 * 1024 * 1024
 
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+app.config["GLYPH_ATLAS_FILL"] = os.environ.get("GLYPH_ATLAS_FILL", "lazy")
+app.config["GLYPH_ATLAS_MAX_BYTES"] = int(os.environ.get("GLYPH_ATLAS_MAX_BYTES", 64 * 1024 * 1024))
+app.config["RENDER_CACHE_SIZE"] = int(os.environ.get("RENDER_CACHE_SIZE", 1024))
+app.config["ARCHIVE_UPLOADS"] = os.environ.get("ARCHIVE_UPLOADS", "0") == "1"
+app.config["RECOGNITION_WORKERS"] = int(os.environ.get("RECOGNITION_WORKERS", 0))
+
+archive_executor = None
+symbol_atlas = None
+segments_atlas = None
+metrics_registry = None
+http_requests = None
+http_latency = None
+stage_latency = None
+request_errors = None
+upload_bytes = None
+decode_failures = None
+
+def init_app():
+    """Process startup: logging, upload folder, render cache, upload archiver, glyph atlases and metrics."""
+    global archive_executor, symbol_atlas, segments_atlas
+
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+    configure_render_cache(app.config["RENDER_CACHE_SIZE"])
+
+    archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-archive")
+
+    if app.config["GLYPH_ATLAS_FILL"] != "off":
+        symbol_atlas = GlyphAtlas(
+            layout="symbol",
+            fill=app.config["GLYPH_ATLAS_FILL"],
+            max_bytes=app.config["GLYPH_ATLAS_MAX_BYTES"],
+        )
+        segments_atlas = GlyphAtlas(
+            layout="segments",
+            fill=app.config["GLYPH_ATLAS_FILL"],
+            max_bytes=app.config["GLYPH_ATLAS_MAX_BYTES"],
+        )
+        logger.info(f"Glyph atlas ready: {symbol_atlas.stats()}, {segments_atlas.stats()}")
+
+    init_metrics()
+
+def init_metrics():
+    """Create the metrics registry served at /metrics and the app's metrics."""
+    global metrics_registry, http_requests, http_latency, stage_latency, request_errors, upload_bytes, decode_failures
+
+    metrics_registry = MetricsRegistry()
+    http_requests = metrics_registry.counter(
+        "http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status")
+    )
+    http_latency = metrics_registry.histogram(
+        "http_request_duration_seconds", "HTTP request latency by route.", ("route",)
+    )
+    stage_latency = metrics_registry.histogram(
+        "cistercian_stage_duration_seconds", "Time spent in each request stage.", ("route", "stage"),
+        buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+    )
+    request_errors = metrics_registry.counter(
+        "cistercian_errors_total", "Exceptions raised while handling requests, by type.", ("route", "exception")
+    )
+    upload_bytes = metrics_registry.histogram(
+        "cistercian_upload_bytes", "Size of uploaded images as received.", ("source",),
+        buckets=(1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+    )
+    decode_failures = metrics_registry.counter(
+        "cistercian_decode_failures_total", "Uploaded images that could not be decoded.", ("source",)
+    )
+    metrics_registry.callback(
+        "cistercian_render_cache_lookups_total", "Render cache lookups by result.",
+        lambda: {("hit",): render_cache.hits, ("miss",): render_cache.misses},
+        kind="counter", labelnames=("result",)
+    )
+    metrics_registry.callback(
+        "cistercian_render_cache_hit_ratio", "Fraction of render cache lookups served from the cache.",
+        lambda: render_cache.stats()["hit_ratio"]
+    )
+    metrics_registry.callback("cistercian_render_cache_entries", "Entries in the render cache.", lambda: len(render_cache))
+    metrics_registry.callback(
+        "cistercian_glyph_atlas_lookups_total", "Glyph atlas lookups by layout and result.", atlas_lookups,
+        kind="counter", labelnames=("layout", "result")
+    )
+    metrics_registry.callback(
+        "cistercian_glyph_atlas_hit_ratio", "Fraction of glyph atlas lookups served from the atlas.", atlas_hit_ratios,
+        labelnames=("layout",)
+    )
+
+def atlas_lookups():
+    lookups = {}
+    for atlas in (symbol_atlas, segments_atlas):
+        if atlas is not None:
+            lookups[(atlas.layout, "hit")] = atlas.hits
+            lookups[(atlas.layout, "miss")] = atlas.misses
+    return lookups
+
+def atlas_hit_ratios():
+    ratios = {}
+    for atlas in (symbol_atlas, segments_atlas):
+        if atlas is not None:
+            lookups = atlas.hits + atlas.misses
+            ratios[(atlas.layout,)] = atlas.hits / lookups if lookups else 0.0
+    return ratios
+
+# Spawned recognition workers re-import the script started with `python app.py`
+# as __mp_main__; they only run recognition, so skip the app's startup there.
+if __name__ != "__mp_main__":
+    init_app()
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def write_upload(data, image_path):
+    try:
+        with open(image_path, "wb") as f:
+            f.write(data)
+    except OSError as e:
+        logger.error(f"Error archiving upload {image_path}: {str(e)}")
+
+def archive_upload(data, filename):
+    """Persist an uploaded file in the background under a collision-free name."""
+    filename = f"{uuid.uuid4().hex}_{secure_filename(filename)}"
+    image_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+    archive_executor.submit(write_upload, data, image_path)
+
+def response_format(data):
+    """Pick the response format from a `format` parameter or the Accept header."""
+    fmt = request.args.get("format") or data.get("format")
+    if fmt:
+        if not isinstance(fmt, str) or fmt not in RESPONSE_FORMATS:
+            raise ValueError(f"Unsupported format: {fmt}")
+        return fmt
+    best = request.accept_mimetypes.best_match(list(ACCEPTED_MIMETYPES))
+    return ACCEPTED_MIMETYPES.get(best, "json")
+
+def parse_compression(source):
+    """Read an optional PNG compression level (0-9) from request parameters."""
+    compression = source.get("compression")
+    if compression is None:
+        return None
+    try:
+        compression = int(compression)
+    except (TypeError, ValueError):
+        raise ValueError("Compression must be between 0 and 9") from None
+    if not 0 <= compression <= 9:
+        raise ValueError("Compression must be between 0 and 9")
+    return compression
+
+def parse_flag(source, name):
+    """Read a boolean request parameter given as 1/true, from the query string or `source`."""
+    value = request.args.get(name) or source.get(name)
+    return str(value).lower() in ("1", "true")
+
+def request_timer():
+    """StageTimer for this request; its stages always feed the stage latency metrics."""
+    g.stage_timer = StageTimer()
+    return g.stage_timer
+
+def with_server_timing(response, timer, timings):
+    """Add a Server-Timing header from `timings` (timer.as_dict()), or none when it is None."""
+    if timings is not None:
+        response.headers["Server-Timing"] = timer.server_timing(timings)
+    return response
+
+def route_label(req=request):
+    """The matched URL rule, so path parameters do not multiply the series."""
+    rule = req.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+def record_error(e):
+    """Count an exception by its type, module-qualified unless built in (e.g. binascii.Error)."""
+    kind = type(e)
+    name = kind.__qualname__ if kind.__module__ == "builtins" else f"{kind.__module__}.{kind.__qualname__}"
+    request_errors.inc(route=route_label(), exception=name)
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # Resolve the context proxies once; each lookup through them costs about a microsecond
+    req = request._get_current_object()
+    ctx = g._get_current_object()
+    route = route_label(req)
+    start = getattr(ctx, "request_start", None)
+    if start is not None:
+        http_latency.observe(time.perf_counter() - start, route=route)
+    http_requests.inc(route=route, method=req.method, status=response.status_code)
+    timer = getattr(ctx, "stage_timer", None)
+    if timer is not None:
+        for name, ms in timer.timings.items():
+            stage_latency.observe(ms / 1000, route=route, stage=name)
+    return response
+
+def record_unhandled_error(sender, exception, **extra):
+    record_error(exception)
+
+got_request_exception.connect(record_unhandled_error, app)
+
+def parse_render_options(source):
+    """Build RenderOptions from request parameters, or None when none are given."""
+    values = {key: source[key] for key in RENDER_OPTION_FIELDS if source.get(key) is not None}
+    if not values:
+        return None
+    return make_render_options(**values)
+
+def render_png(number, include_segments, options=None):
+    """Return the raw PNG bytes of a numeral, from the glyph atlas when enabled."""
+    atlas = segments_atlas if include_segments else symbol_atlas
+    if atlas is not None and options is None:
+        return atlas.get_png(number)
+    return encode_image_to_png(render_raw(number, include_segments, options))
+
+def render_raw(number, include_segments, options=None):
+    """Render a numeral to a raw grayscale image in the requested layout."""
+    if include_segments:
+        img, _ = render_cistercian_with_segments(number, options)
+        return img
+    return render_cistercian_image(number, options=options)
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -42,51 +278,216 @@ def convert_to_cistercian():
         if number < 0 or number > 9999:
             return jsonify({"error": "Number must be between 0 and 9999"}), 400
 
-        if include_segments:
-            result = number_to_cistercian_with_segments(number)
-            return jsonify({
-                "image": result["image_data"],
-                "number": number,
-                "segments": result["segments"]
-            })
-        else:
-            img_base64 = number_to_cistercian_image(number)
-            return jsonify({"image": img_base64, "number": number})
-
-    except ValueError:
+        try:
+            fmt = response_format(data)
+            options = parse_render_options(data)
+            compression = parse_compression(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        timer = request_timer()
+        report = parse_flag(data, "timings")
+
+        if fmt != "json":
+            if fmt == "png" and compression is None:
+                with timer.stage("render"):
+                    body = render_png(number, include_segments, options)
+            else:
+                with timer.stage("render"):
+                    img = render_raw(number, include_segments, options)
+                with timer.stage("encode"):
+                    body = encode_image(img, fmt, compression)
+            response = Response(body, mimetype=IMAGE_FORMATS[fmt])
+            response.headers["X-Cistercian-Number"] = str(number)
+            return with_server_timing(response, timer, timer.as_dict() if report else None)
+
+        with timer.stage("render"):
+            if include_segments:
+                if segments_atlas is not None and options is None:
+                    result = segments_atlas.get_with_segments(number)
+                else:
+                    result = cached_number_to_cistercian_with_segments(number, options)
+                payload = {
+                    "image": result["image_data"],
+                    "number": number,
+                    "segments": result["segments"]
+                }
+            else:
+                if symbol_atlas is not None and options is None:
+                    img_base64 = symbol_atlas.get_base64(number)
+                else:
+                    img_base64 = cached_number_to_cistercian_image(number, options)
+                payload = {"image": img_base64, "number": number}
+
+        timings = timer.as_dict() if report else None
+        if timings is not None:
+            payload["timings"] = timings
+        return with_server_timing(jsonify(payload), timer, timings)
+
+    except ValueError as e:
+        record_error(e)
         return jsonify({"error": "Invalid number format"}), 400
     except Exception as e:
+        record_error(e)
         logger.error(f"Error converting to Cistercian: {str(e)}")
         return jsonify({"error": "An error occurred during conversion"}), 500
 
+def glyph_etag(number, layout, options=None):
+    """Strong ETag for a rendered glyph: rendering is a pure function of these inputs."""
+    etag = f"r{RENDERER_VERSION}-{layout}-{number}"
+    if options is not None:
+        etag += "-" + "-".join(str(value) for value in options)
+    return etag
+
+def not_modified(etag):
+    """Return a 304 response if the client already holds this glyph, otherwise None."""
+    # If-None-Match uses weak comparison (RFC 7232), so W/"..." from a compressing proxy matches
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+def cacheable_response(body, mimetype, etag):
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+@app.route("/cistercian/<int:number>.png", methods=["GET"])
+def cistercian_png(number):
+    if number > 9999:
+        return jsonify({"error": "Number must be between 0 and 9999"}), 404
+
+    try:
+        options = parse_render_options(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    etag = glyph_etag(number, "symbol", options)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        return cacheable_response(render_png(number, False, options), "image/png", etag)
+    except Exception as e:
+        record_error(e)
+        logger.error(f"Error rendering Cistercian PNG: {str(e)}")
+        return jsonify({"error": "An error occurred during conversion"}), 500
+
+@app.route("/cistercian/<int:number>.svg", methods=["GET"])
+def cistercian_svg(number):
+    if number > 9999:
+        return jsonify({"error": "Number must be between 0 and 9999"}), 404
+
+    try:
+        size = int(request.args.get("size", 400))
+        options = parse_render_options(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if size < 1 or size > 4096:
+        return jsonify({"error": "Size must be between 1 and 4096"}), 400
+
+    etag = glyph_etag(number, f"svg{size}", options)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        return cacheable_response(number_to_cistercian_svg(number, size=size, options=options), "image/svg+xml", etag)
+    except Exception as e:
+        record_error(e)
+        logger.error(f"Error rendering Cistercian SVG: {str(e)}")
+        return jsonify({"error": "An error occurred during conversion"}), 500
+
+@app.route("/cistercian/<int:number>/encodings", methods=["GET"])
+def cistercian_encodings(number):
+    if number > 9999:
+        return jsonify({"error": "Number must be between 0 and 9999"}), 404
+
+    try:
+        options = parse_render_options(request.args)
+        compression = parse_compression(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        img = render_cistercian_image(number, options=options)
+        return jsonify({"number": number, "encodings": profile_encodings(img, compression=compression)})
+    except Exception as e:
+        record_error(e)
+        logger.error(f"Error profiling Cistercian encodings: {str(e)}")
+        return jsonify({"error": "An error occurred during conversion"}), 500
+
+def recognize(image, engine, debug=False, timings=NULL_TIMER):
+    """Run recognition in the worker pool when RECOGNITION_WORKERS is set, inline otherwise."""
+    workers = app.config["RECOGNITION_WORKERS"]
+    if workers > 0:
+        with timings.stage("pool"):
+            result = get_recognition_executor(workers).recognize(image, engine, debug, timings.enabled)
+        for name, ms in result.pop("timings", {}).items():
+            if name != "total":
+                timings.add(name, ms)
+        return result
+    return recognize_cistercian_numeral(image, engine=engine, debug=debug, timings=timings)
+
+def decode_upload(decode, data, source, timer):
+    """Decode an uploaded image with `decode`, recording its size and any decode failure."""
+    upload_bytes.observe(len(data), source=source)
+    try:
+        with timer.stage("decode"):
+            image = decode(data)
+    except Exception:
+        decode_failures.inc(source=source)
+        raise
+    if image is None:
+        decode_failures.inc(source=source)
+    return image
+
 @app.route("/recognize-cistercian", methods=["POST"])
 def recognize_cistercian():
     try:
         image = None
+        timer = request_timer()
+        report = parse_flag(request.form, "timings")
+        engine = request.form.get("engine") or request.args.get("engine", "heuristic")
+        if engine not in ENGINES:
+            return jsonify({"error": f"Unknown recognition engine: {engine}"}), 400
 
         if "file" in request.files:
             file = request.files["file"]
             if file.filename == "":
                 return jsonify({"error": "No file selected"}), 400
             if allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                image_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-                file.save(image_path)
-                image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+                data = file.read()
+                image = decode_upload(decode_image_bytes, data, "file", timer)
+                if image is not None and app.config["ARCHIVE_UPLOADS"]:
+                    archive_upload(data, file.filename)
 
         elif "imageData" in request.form:
             image_data = request.form["imageData"]
-            image = decode_base64_image(image_data)
+            image = decode_upload(decode_base64_image, image_data, "base64", timer)
 
         if image is None:
             return jsonify({"error": "Could not process the image"}), 400
 
-        result = recognize_cistercian_numeral(image)
-        return jsonify(result)
+        debug = parse_flag(request.form, "debug")
+        result = recognize(image, engine, debug, timer)
+        timings = timer.as_dict() if report else None
+        if timings is not None:
+            result["timings"] = timings
+        return with_server_timing(jsonify(result), timer, timings)
 
     except Exception as e:
+        record_error(e)
         logger.error(f"Error recognizing Cistercian: {str(e)}")
         return jsonify({"error": "An error occurred during recognition"}), 500
 
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,177 @@
+"""
+Recognition benchmark over synthetic ground truth.
+
+Renders numerals with the renderer (optionally augmented by
+synthetic_dataset, or read from a generated dataset), runs them through
+recognize_cistercian_numeral and reports throughput, per-stage
+latency percentiles and per-quadrant confusion matrices.
+
+    python benchmark_recognition.py --engine template --json results.json
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+
+import numpy as np
+
+from cistercian_renderer import QUADRANTS, decode_base64_image, encode_image_to_base64, render_batch
+from cistercian_recognition import ENGINES, QUADRANT_PLACES, recognize_cistercian_numeral
+from stage_timing import NULL_TIMER, StageTimer
+from synthetic_dataset import generate_samples, load_shards
+
+PERCENTILES = (50, 95, 99)
+
+PLACES = [QUADRANT_PLACES[q] for q in QUADRANTS]
+
+def generate_numerals(numbers, augment_strength=0.0, seed=0):
+    """
+    Yield (number, image) ground-truth pairs.
+
+    Clean images are composited with render_batch, which produces the same
+    pixels as render_cistercian_image (and so number_to_cistercian_image) in
+    bulk. With augmentation, images come from synthetic_dataset, seeded per
+    sample so runs are repeatable.
+    """
+    numbers = list(numbers)
+    if augment_strength > 0:
+        for image, number in generate_samples(len(numbers), seed, numbers, strength=augment_strength):
+            yield number, image
+        return
+
+    for start in range(0, len(numbers), 1000):
+        chunk = numbers[start:start + 1000]
+        yield from zip(chunk, render_batch(chunk))
+
+def percentiles(samples):
+    values = np.percentile(np.asarray(samples, dtype=np.float64), PERCENTILES)
+    return {f"p{p}": round(float(v), 4) for p, v in zip(PERCENTILES, values)}
+
+def run_benchmark(engine="heuristic", numbers=range(10000), augment_strength=0.0, seed=0,
+                  via_base64=False, stages=True, dataset=None):
+    """
+    Recognize rendered numerals and measure speed and accuracy.
+
+    Args:
+        engine: Recognition engine
+        numbers: Ground-truth numbers to render
+        augment_strength: synthetic_dataset augmentation strength, 0 for clean renderer output
+        seed: Seed for the augmentation
+        via_base64: Feed base64 PNG data URIs, as returned by number_to_cistercian_image,
+            through decode_base64_image (timed as 'decode')
+        stages: Also collect per-stage timings with a StageTimer
+        dataset: Directory written by synthetic_dataset.write_shards; replaces
+            numbers, augment_strength and seed
+
+    Returns:
+        Dictionary with throughput, latency percentiles per stage, accuracy and
+        per-quadrant confusion matrices (rows: true digit, columns: recognized digit)
+    """
+    confusion = np.zeros((len(QUADRANTS), 10, 10), dtype=np.int64)
+    latencies = {"total": []}
+    correct = 0
+    elapsed = 0.0
+    count = 0
+
+    if dataset is not None:
+        samples = ((label, image) for image, label in load_shards(dataset))
+    else:
+        samples = generate_numerals(numbers, augment_strength, seed)
+
+    # Untimed warm-up, so one-off setup such as building the digit templates stays out of the latencies
+    recognize_cistercian_numeral(render_batch([8888])[0], engine=engine)
+
+    for number, image in samples:
+        if via_base64:
+            data_uri = encode_image_to_base64(image)
+            start = time.perf_counter()
+            image = decode_base64_image(data_uri)
+            latencies.setdefault("decode", []).append((time.perf_counter() - start) * 1000)
+
+        timer = StageTimer() if stages else NULL_TIMER
+        start = time.perf_counter()
+        result = recognize_cistercian_numeral(image, engine=engine, timings=timer)
+        duration = time.perf_counter() - start
+        elapsed += duration
+        latencies["total"].append(duration * 1000)
+        count += 1
+
+        recognized = result["number"]
+        correct += recognized == number
+        for place in range(len(QUADRANTS)):
+            confusion[place, number // 10 ** place % 10, recognized // 10 ** place % 10] += 1
+
+        for name, ms in timer.timings.items():
+            latencies.setdefault(name, []).append(ms)
+
+    digit_accuracy = confusion.trace(axis1=1, axis2=2) / np.maximum(confusion.sum(axis=(1, 2)), 1)
+
+    return {
+        "engine": engine,
+        "images": count,
+        "dataset": dataset,
+        "augment": augment_strength,
+        "seed": seed,
+        "images_per_sec": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {name: percentiles(samples) for name, samples in latencies.items()},
+        "accuracy": {
+            "number": round(correct / max(count, 1), 4),
+            "digit": round(float(digit_accuracy.mean()), 4),
+            **{place: round(float(acc), 4) for place, acc in zip(PLACES, digit_accuracy)}
+        },
+        "confusion": {place: confusion[i].tolist() for i, place in enumerate(PLACES)}
+    }
+
+def format_report(result):
+    """Render a benchmark result as plain text."""
+    source = f"dataset={result['dataset']}" if result["dataset"] else f"augment={result['augment']} seed={result['seed']}"
+    lines = [
+        f"engine={result['engine']} images={result['images']} {source}",
+        f"throughput: {result['images_per_sec']} images/sec",
+        "",
+        f"{'stage':<24}" + "".join(f"{f'p{p} ms':>10}" for p in PERCENTILES)
+    ]
+    for name, stats in result["latency_ms"].items():
+        lines.append(f"{name:<24}" + "".join(f"{stats[f'p{p}']:>10.3f}" for p in PERCENTILES))
+
+    accuracy = result["accuracy"]
+    lines += ["", f"accuracy: number={accuracy['number']:.2%} digit={accuracy['digit']:.2%}"]
+    for place in PLACES:
+        lines += ["", f"{place} ({accuracy[place]:.2%}), rows true / columns recognized:"]
+        lines.append("    " + "".join(f"{d:>6}" for d in range(10)))
+        for digit, row in enumerate(result["confusion"][place]):
+            lines.append(f"{digit:>4}" + "".join(f"{n:>6}" for n in row))
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Cistercian numeral recognition on rendered ground truth.")
+    parser.add_argument("--engine", choices=ENGINES, default="heuristic")
+    parser.add_argument("--step", type=int, default=1, help="Use every STEP-th numeral of 0-9999")
+    parser.add_argument("--augment", type=float, default=0.0, help="Augmentation strength (0 = clean renderer output)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dataset", metavar="DIR", help="Read samples from a synthetic_dataset directory instead of rendering")
+    parser.add_argument("--via-base64", action="store_true", help="Round-trip images through base64 PNG and time decoding")
+    parser.add_argument("--no-stages", action="store_true", help="Skip the per-stage timing pass")
+    parser.add_argument("--json", metavar="PATH", help="Write the full result as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    result = run_benchmark(
+        engine=args.engine,
+        numbers=range(0, 10000, args.step),
+        augment_strength=args.augment,
+        seed=args.seed,
+        via_base64=args.via_base64,
+        stages=not args.no_stages,
+        dataset=args.dataset
+    )
+    print(format_report(result))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Renderer micro-benchmarks with regression checks.
+
+Times the renderer building blocks in isolation and end to end, reports
+ns/op and traced allocation bytes per op, and optionally compares against
+a stored baseline:
+
+    python benchmark_renderer.py --json baseline.json
+    python benchmark_renderer.py --baseline baseline.json --threshold 0.1
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from itertools import cycle
+
+import cv2
+import numpy as np
+
+from cistercian_renderer import (
+    create_blank_image,
+    draw_cistercian_symbol,
+    encode_image_to_base64,
+    number_to_cistercian_with_segments,
+    render_cistercian_image
+)
+
+# Numerals cycled through by every case, so no single glyph dominates
+BENCH_NUMBERS = tuple(range(0, 10000, 97)) + (9999,)
+
+def _case_create_blank_image():
+    return lambda: create_blank_image()
+
+def _case_draw_cistercian_symbol():
+    img = create_blank_image()
+    numbers = cycle(BENCH_NUMBERS)
+    return lambda: draw_cistercian_symbol(img, next(numbers))
+
+def _case_encode_image_to_base64():
+    images = cycle([render_cistercian_image(n) for n in BENCH_NUMBERS])
+    return lambda: encode_image_to_base64(next(images))
+
+def _case_number_to_cistercian_with_segments():
+    numbers = cycle(BENCH_NUMBERS)
+    return lambda: number_to_cistercian_with_segments(next(numbers))
+
+def _case_end_to_end():
+    # Uncached JSON body of /convert-to-cistercian with include_segments
+    numbers = cycle(BENCH_NUMBERS)
+
+    def run():
+        number = next(numbers)
+        result = number_to_cistercian_with_segments(number)
+        return json.dumps({"image": result["image_data"], "number": number, "segments": result["segments"]})
+    return run
+
+CASES = {
+    "create_blank_image": _case_create_blank_image,
+    "draw_cistercian_symbol": _case_draw_cistercian_symbol,
+    "encode_image_to_base64": _case_encode_image_to_base64,
+    "number_to_cistercian_with_segments": _case_number_to_cistercian_with_segments,
+    "end_to_end": _case_end_to_end
+}
+
+def time_case(op, min_time=0.2, repeat=5):
+    """
+    Measure nanoseconds per call of op.
+
+    The op count is calibrated so one run takes at least min_time seconds,
+    then the run is repeated.
+
+    Returns:
+        Tuple (ops per run, list of ns/op for each run)
+    """
+    ops = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(ops):
+            op()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time * 1e9:
+            break
+        ops = max(ops * 2, int(ops * min_time * 1e9 / max(elapsed, 1) * 1.2))
+
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(ops):
+            op()
+        runs.append((time.perf_counter_ns() - start) / ops)
+    return ops, runs
+
+def trace_allocations(op, ops=200):
+    """
+    Measure traced allocation bytes per call of op with tracemalloc.
+
+    NumPy buffers are included, since NumPy reports them to tracemalloc.
+
+    Returns:
+        Tuple (mean peak bytes allocated during one call, mean bytes still held after it)
+    """
+    op()
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(ops):
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            op()
+            peak_total += tracemalloc.get_traced_memory()[1] - current
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return peak_total / ops, retained / ops
+
+def run_benchmarks(cases=None, min_time=0.2, repeat=5):
+    """
+    Run the renderer benchmarks.
+
+    Args:
+        cases: Names from CASES, defaults to all
+        min_time: Minimum seconds per timed run
+        repeat: Timed runs per case
+
+    Returns:
+        Dictionary with environment details and per-case results
+    """
+    results = {}
+    for name in cases or CASES:
+        op = CASES[name]()
+        ops, runs = time_case(op, min_time, repeat)
+        peak_bytes, retained_bytes = trace_allocations(CASES[name]())
+        results[name] = {
+            "ns_per_op": round(min(runs), 1),
+            "median_ns_per_op": round(statistics.median(runs), 1),
+            "ops": ops,
+            "repeat": repeat,
+            "peak_bytes_per_op": round(peak_bytes),
+            "retained_bytes_per_op": round(retained_bytes, 1)
+        }
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+        "cases": results
+    }
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Find cases that regressed against a baseline.
+
+    A case regresses when its ns/op or peak bytes/op exceeds the baseline by
+    more than threshold (a fraction, 0.1 = 10%).
+
+    Returns:
+        List of (case, metric, baseline value, current value) tuples
+    """
+    regressions = []
+    for name, current in results["cases"].items():
+        previous = baseline.get("cases", {}).get(name)
+        if previous is None:
+            continue
+        for metric in ("ns_per_op", "peak_bytes_per_op"):
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append((name, metric, previous[metric], current[metric]))
+    return regressions
+
+def format_report(results, baseline=None):
+    """Render benchmark results, with the change against a baseline if given, as plain text."""
+    lines = [
+        f"python {results['python']}, numpy {results['numpy']}, opencv {results['opencv']}",
+        "",
+        f"{'case':<36}{'ns/op':>12}{'median':>12}{'peak B/op':>12}{'kept B/op':>12}" + (f"{'vs base':>10}" if baseline else "")
+    ]
+    for name, case in results["cases"].items():
+        line = (
+            f"{name:<36}{case['ns_per_op']:>12,.0f}{case['median_ns_per_op']:>12,.0f}"
+            f"{case['peak_bytes_per_op']:>12,}{case['retained_bytes_per_op']:>12,.0f}"
+        )
+        previous = (baseline or {}).get("cases", {}).get(name)
+        if previous:
+            line += f"{case['ns_per_op'] / previous['ns_per_op'] - 1:>+10.1%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Cistercian renderer.")
+    parser.add_argument("--case", action="append", choices=list(CASES), help="Case to run (repeatable), defaults to all")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per timed run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--json", metavar="PATH", help="Write results as JSON (usable as a baseline)")
+    parser.add_argument("--baseline", metavar="PATH", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown as a fraction of the baseline")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = run_benchmarks(args.case, args.min_time, args.repeat)
+    print(format_report(results, baseline))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, previous, current in regressions:
+            print(f"REGRESSION {name} {metric}: {previous:,.0f} -> {current:,.0f} (threshold {args.threshold:.0%})")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,62 +1,299 @@
 import cv2
 import numpy as np
+import functools
 import logging
+import time
+from collections import namedtuple
+
+from cistercian_renderer import QUADRANTS, SYMBOL_SIZE, encode_image_to_base64, render_cistercian_image, symbol_geometry
+from stage_timing import NULL_TIMER
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def preprocess_image(image):
+ENGINES = ("heuristic", "components", "template")
+
+QUADRANT_PLACES = {
+    'top-right': "units",
+    'top-left': "tens",
+    'bottom-right': "hundreds",
+    'bottom-left': "thousands"
+}
+
+TEMPLATE_SIZE = 24
+
+# Images per multi-channel OpenCV call in preprocess_batch (OpenCV 5 allows 128 channels).
+BATCH_PLANES = 128
+
+# Aspect-ratio bounds of a diagonal stroke (30-60 degrees) for the components engine
+TAN_30 = np.tan(np.pi / 6)
+TAN_60 = np.tan(np.pi / 3)
+
+class _TraceFields:
+    """Renders trace fields as key=value pairs, only when a record is actually emitted."""
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        return " ".join(f"{key}={value}" for key, value in self.fields.items())
+
+def tracing():
+    """True when recognition trace records will be emitted."""
+    return logger.isEnabledFor(logging.DEBUG)
+
+def _trace(event, **fields):
     """
-    Preprocess the image for better feature extraction.
+    Emit a structured DEBUG record for a recognition event.
     
-    Args:
-        image: Input image (color or grayscale)
-        
-    Returns:
-        Preprocessed binary image
+    Nothing is formatted unless DEBUG is enabled for this logger. The fields
+    are also attached to the record as `trace` for structured handlers.
+    Guard fields that are costly to compute with tracing().
     """
-    if len(image.shape) > 2:
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if tracing():
+        logger.debug("%s %s", event, _TraceFields(fields), extra={"trace": fields})
+
+PREPROCESS_SIZE = (300, 400)
 
-    image = cv2.resize(image, (300, 400))
+PreprocessStage = namedtuple('PreprocessStage', ['name', 'run'])
+PreprocessReport = namedtuple('PreprocessReport', ['binary', 'timings', 'skipped', 'state'])
 
-    logger.debug(f"Resized image shape: {image.shape}")
+def _stage_gray(image, state):
+    if image.ndim == 2:
+        return None
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
-    normalized = cv2.normalize(image, None, alpha=0, beta=255, norm_type=cv2.NORM_MINMAX)
+def _stage_resize(image, state):
+    if image.shape[::-1] == PREPROCESS_SIZE:
+        return None
+    return cv2.resize(image, PREPROCESS_SIZE)
 
-    blurred = cv2.GaussianBlur(normalized, (5, 5), 0)
+def _stage_normalize(image, state):
+    lo, hi, _, _ = cv2.minMaxLoc(image)
+    # Only two grey levels, e.g. a renderer-produced image: Otsu alone separates them
+    state['clean'] = hi - lo < 2 or cv2.countNonZero(cv2.inRange(image, lo + 1, hi - 1)) == 0
+    if lo == 0 and hi == 255:
+        return None
+    return cv2.normalize(image, None, alpha=0, beta=255, norm_type=cv2.NORM_MINMAX)
 
-    _, binary_otsu = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+def _stage_blur(image, state):
+    return cv2.GaussianBlur(image, (5, 5), 0)
 
+def _stage_threshold(image, state):
+    _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if state.get('clean') and state.get('otsu_if_clean'):
+        state['threshold'] = 'otsu'
+        return binary
+    state['threshold'] = 'otsu+adaptive'
     binary_adaptive = cv2.adaptiveThreshold(
-        blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+        image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
         cv2.THRESH_BINARY_INV, 11, 2
     )
+    return cv2.bitwise_or(binary, binary_adaptive)
 
-    binary = cv2.bitwise_or(binary_otsu, binary_adaptive)
-    kernel = np.ones((3, 3), np.uint8)
-    binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel, iterations=1)
-    binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel, iterations=2)
-    binary = cv2.dilate(binary, kernel, iterations=1)
+_MORPH_KERNEL = np.ones((3, 3), np.uint8)
 
-    non_zero = np.count_nonzero(binary)
-    total_pixels = binary.shape[0] * binary.shape[1]
-    logger.debug(f"Binary image has {non_zero} non-zero pixels out of {total_pixels} ({non_zero/total_pixels:.2%})")
+def _stage_morphology(image, state):
+    binary = cv2.morphologyEx(image, cv2.MORPH_OPEN, _MORPH_KERNEL, iterations=1)
+    binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, _MORPH_KERNEL, iterations=2)
+    return cv2.dilate(binary, _MORPH_KERNEL, iterations=1)
+
+DEFAULT_PREPROCESS_STAGES = (
+    PreprocessStage('gray', _stage_gray),
+    PreprocessStage('resize', _stage_resize),
+    PreprocessStage('normalize', _stage_normalize),
+    PreprocessStage('blur', _stage_blur),
+    PreprocessStage('threshold', _stage_threshold),
+    PreprocessStage('morphology', _stage_morphology)
+)
+
+class PreprocessPipeline:
+    """
+    Ordered preprocessing stages that may skip work the input doesn't need.
+    
+    Each stage is a PreprocessStage whose run(image, state) returns the
+    processed image, or None to skip and pass the image through unchanged.
+    `state` is a dict shared by the stages of one run, e.g. normalize
+    records whether the image is clean so threshold can use Otsu alone
+    when the caller set 'otsu_if_clean'.
+    
+    Args:
+        stages: Sequence of PreprocessStage, defaults to DEFAULT_PREPROCESS_STAGES
+    """
+
+    def __init__(self, stages=DEFAULT_PREPROCESS_STAGES):
+        self.stages = tuple(stages)
+
+    def __call__(self, image, **options):
+        return self.run(image, **options).binary
+
+    def run(self, image, **options):
+        """
+        Run all stages on an image.
+        
+        Args:
+            image: Input image
+            **options: Initial entries of the shared state
+        
+        Returns:
+            PreprocessReport with the binary image, per-stage timings in
+            milliseconds, the names of skipped stages and the shared state
+        """
+        state = dict(options)
+        timings = {}
+        skipped = []
+        for stage in self.stages:
+            start = time.perf_counter()
+            result = stage.run(image, state)
+            timings[stage.name] = (time.perf_counter() - start) * 1000
+            if result is None:
+                skipped.append(stage.name)
+            else:
+                image = result
+        return PreprocessReport(image, timings, tuple(skipped), state)
+
+default_preprocess_pipeline = PreprocessPipeline()
+
+def preprocess_image(image, timings=NULL_TIMER, otsu_if_clean=False):
+    """
+    Preprocess the image for better feature extraction.
+    
+    Runs default_preprocess_pipeline: grayscale, resize to 300x400,
+    normalize, blur, Otsu + adaptive threshold and morphology, skipping
+    stages the input doesn't need.
+    
+    Args:
+        image: Input image (color or grayscale)
+        timings: StageTimer receiving the pipeline stages as 'preprocess.<stage>'
+        otsu_if_clean: Threshold two-level input with Otsu alone. Faster, but
+            strokes come out slightly thinner, which changes some results of
+            the feature engines; the template engine and its templates use it.
+        
+    Returns:
+        Preprocessed binary image
+    """
+    report = default_preprocess_pipeline.run(image, otsu_if_clean=otsu_if_clean)
+    binary = report.binary
+    for name, ms in report.timings.items():
+        timings.add(f"preprocess.{name}", ms)
+
+    if tracing():
+        non_zero = cv2.countNonZero(binary)
+        _trace(
+            "preprocess", shape=binary.shape, ink_pixels=non_zero, ink_ratio=round(non_zero / binary.size, 4),
+            skipped=report.skipped, timings_ms={k: round(v, 3) for k, v in report.timings.items()}
+        )
 
     return binary
 
-def find_stem_and_quadrants(binary_image):
+def preprocess_batch(images, otsu_if_clean=False):
+    """
+    Preprocess a batch of images with the preprocess_image pipeline, vectorized across the batch.
+    
+    Images are converted to grayscale and resized individually (skipped when
+    they already are 300x400). The stack is then laid out as images with one
+    channel per input, so each OpenCV blur and morphology call, the Otsu
+    histogram and the adaptive comparison cover up to BATCH_PLANES inputs at once.
+    
+    Args:
+        images: Sequence of images or an (N, H, W) array
+        otsu_if_clean: As for preprocess_image
+        
+    Returns:
+        Binary images as an array of shape (N, 400, 300)
+    """
+    binaries = np.empty((len(images), 400, 300), np.uint8)
+    for start in range(0, len(images), BATCH_PLANES):
+        planes = _preprocess_planes(_stack_planes(images[start:start + BATCH_PLANES]), otsu_if_clean)
+        binaries[start:start + planes.shape[2]] = np.moveaxis(planes, 2, 0)
+    return binaries
+
+def _stack_planes(images):
+    """Stack grayscale 300x400 versions of the images as channels of one (400, 300, N) array."""
+    if isinstance(images, np.ndarray) and images.shape[1:] == (400, 300) and images.dtype == np.uint8:
+        return np.ascontiguousarray(np.moveaxis(images, 0, 2))
+    
+    planes = np.empty((400, 300, len(images)), np.uint8)
+    for i, image in enumerate(images):
+        if len(image.shape) > 2:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if image.shape != (400, 300):
+            image = cv2.resize(image, (300, 400))
+        planes[:, :, i] = image
+    return planes
+
+def _preprocess_planes(planes, otsu_if_clean=False):
+    shape = planes.shape
+    low = planes.min(axis=(0, 1))
+    high = planes.max(axis=(0, 1))
+    # With otsu_if_clean, two-level images get Otsu alone, as in the default PreprocessPipeline
+    if otsu_if_clean:
+        clean = ((planes == low) | (planes == high)).all(axis=(0, 1))
+    else:
+        clean = np.zeros(shape[2], dtype=bool)
+    if (low == 0).all() and (high == 255).all():
+        normalized = planes
+    else:
+        span = high.astype(np.float32) - low
+        scale = np.where(span > 0, 255.0 / np.maximum(span, 1), 0.0).astype(np.float32)
+        normalized = np.rint((planes - low.astype(np.float32)) * scale).astype(np.uint8)
+    
+    blurred = cv2.GaussianBlur(normalized, (5, 5), 0).reshape(shape)
+    
+    thresholds = _otsu_thresholds(blurred)
+    binary_otsu = blurred <= thresholds.astype(np.uint8)
+    
+    if not clean.all():
+        # adaptiveThreshold rounds a floating-point Gaussian mean; the 8-bit
+        # fixed-point GaussianBlur can land one grey level lower
+        local_mean = np.rint(cv2.GaussianBlur(
+            blurred.astype(np.float32), (11, 11), 0, borderType=cv2.BORDER_REPLICATE
+        ).reshape(shape))
+        binary_adaptive = blurred <= local_mean - 2
+        binary_otsu |= binary_adaptive & ~clean
+    
+    binary = binary_otsu.view(np.uint8) * np.uint8(255)
+    kernel = np.ones((3, 3), np.uint8)
+    binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel, iterations=1).reshape(shape)
+    binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel, iterations=2).reshape(shape)
+    return cv2.dilate(binary, kernel, iterations=1).reshape(shape)
+
+def _otsu_thresholds(planes):
+    """
+    Otsu threshold of every channel of a (H, W, C) uint8 array.
+    
+    Histograms are read per channel with cv2.calcHist, straight from the
+    interleaved array; the threshold search then runs on all of them at once.
+    """
+    channels = planes.shape[2]
+    hist = np.stack([
+        cv2.calcHist([planes], [c], None, [256], [0, 256]).ravel()
+        for c in range(channels)
+    ]).astype(np.float64)
+    hist /= hist.sum(axis=1, keepdims=True)
+    
+    levels = np.arange(256)
+    omega = np.cumsum(hist, axis=1)
+    mu = np.cumsum(hist * levels, axis=1)
+    mu_total = mu[:, -1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma = (mu_total * omega - mu) ** 2 / (omega * (1 - omega))
+    sigma = np.nan_to_num(sigma, nan=0.0, posinf=0.0)
+    return np.argmax(sigma, axis=1)
+
+def find_stem_and_quadrants(binary_image, debug=False):
     """
     Find the main vertical stem of the Cistercian numeral and divide into quadrants.
     
     Args:
         binary_image: Preprocessed binary image
+        debug: Also draw the stem and quadrants into a 'debug_image' overlay
         
     Returns:
         Dictionary with stem coordinates and quadrant boundaries
     """
     height, width = binary_image.shape
-    logger.debug(f"Image dimensions: {width}x{height}")
 
     contours, _ = cv2.findContours(binary_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
@@ -65,18 +302,15 @@ def find_stem_and_quadrants(binary_image):
         x, y = 0, 0
         w, h = width, height
     else:
-        logger.debug(f"Found {len(contours)} contours")
         all_points = np.concatenate([cnt for cnt in contours])
         x, y, w, h = cv2.boundingRect(all_points)
-        logger.debug(f"Bounding rectangle: x={x}, y={y}, width={w}, height={h}")
         if w < 20 or h < 20:
-            logger.warning(f"Contour too small (w={w}, h={h}), using default quadrants")
+            logger.warning("Contour too small (w=%d, h=%d), using default quadrants", w, h)
             x, y = 0, 0
             w, h = width, height
 
     center_x = x + w // 2
     center_y = y + h // 2
-    logger.debug(f"Center point: ({center_x}, {center_y})")
 
     stem_x = center_x
     stem_top = y
@@ -89,75 +323,191 @@ def find_stem_and_quadrants(binary_image):
         'bottom-right': (int(stem_x), int(center_y), int(x + w), int(y + h))
     }
 
-    for name, coords in quadrants.items():
-        logger.debug(f"Quadrant {name}: {coords}")
-
-    visual_debug = cv2.cvtColor(binary_image.copy(), cv2.COLOR_GRAY2BGR)
-    cv2.line(visual_debug, (stem_x, stem_top), (stem_x, stem_bottom), (0, 255, 0), 2)
-    cv2.line(visual_debug, (x, center_y), (x + w, center_y), (0, 255, 0), 2)
+    _trace("stem", contours=len(contours), bbox=(x, y, w, h), center=(center_x, center_y), quadrants=quadrants)
 
-    return {
+    structure = {
         'stem': (stem_x, stem_top, stem_x, stem_bottom),
         'quadrants': quadrants
     }
+    if debug:
+        structure['debug_image'] = draw_debug_overlay(binary_image, structure['stem'], quadrants)
+    return structure
 
-def detect_features_in_quadrant(binary_image, quadrant_coords):
+def draw_debug_overlay(binary_image, stem, quadrants):
     """
-    Detect features in a specific quadrant to determine the digit.
+    Draw the detected stem and quadrant boxes over a binary image.
     
     Args:
         binary_image: Preprocessed binary image
-        quadrant_coords: (x1, y1, x2, y2) coordinates of the quadrant
+        stem: (x1, y1, x2, y2) stem line, or None if no stem was found
+        quadrants: Quadrant boxes keyed by quadrant name
         
     Returns:
-        Estimated digit for the quadrant
+        BGR overlay image
     """
-    x1, y1, x2, y2 = map(int, quadrant_coords)
+    overlay = cv2.cvtColor(binary_image, cv2.COLOR_GRAY2BGR)
+    for x1, y1, x2, y2 in quadrants.values():
+        cv2.rectangle(overlay, (int(x1), int(y1)), (int(x2), int(y2)), (255, 128, 0), 1)
+    if stem is not None:
+        x1, y1, x2, y2 = map(int, stem)
+        cv2.line(overlay, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    return overlay
 
-    height, width = binary_image.shape
+_debug_sink = None
+
+def set_debug_sink(sink):
+    """
+    Register a callable that receives every debug overlay.
+    
+    Args:
+        sink: Callable taking (overlay, result), or None to disable
+    """
+    global _debug_sink
+    _debug_sink = sink
+
+def _attach_debug_image(result, overlay):
+    result["debug_image"] = encode_image_to_base64(overlay)
+    if _debug_sink is not None:
+        try:
+            _debug_sink(overlay, result)
+        except Exception as e:
+            logger.error(f"Debug sink failed: {str(e)}")
+    return result
+
+def _clip_box(shape, quadrant_coords):
+    x1, y1, x2, y2 = map(int, quadrant_coords)
+    height, width = shape
     x1 = max(0, min(x1, width-1))
     x2 = max(0, min(x2, width))
     y1 = max(0, min(y1, height-1))
     y2 = max(0, min(y2, height))
+    return x1, y1, x2, y2
 
-    if x2 <= x1 or y2 <= y1:
-        return 0
+class QuadrantRegion:
+    """
+    Clipped view of one quadrant with its ink statistics.
+    
+    Args:
+        binary_image: Preprocessed binary image
+        quadrant_coords: (x1, y1, x2, y2) coordinates of the quadrant
+    """
 
-    quadrant_img = binary_image[y1:y2, x1:x2]
+    def __init__(self, binary_image, quadrant_coords):
+        x1, y1, x2, y2 = _clip_box(binary_image.shape, quadrant_coords)
+        self.origin = (x1, y1)
+        self.ink = 0
+        self.filled = 0
+        self.area = 0
 
-    if np.sum(quadrant_img) < 100:
-        return 0
+        if x2 <= x1 or y2 <= y1:
+            self.image = None
+            return
 
-    contours, _ = cv2.findContours(quadrant_img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        self.image = binary_image[y1:y2, x1:x2]
+        self.area = self.image.size
+        self.ink = int(np.sum(self.image))
+        self.filled = cv2.countNonZero(self.image)
 
-    if not contours:
-        return 0
+    @property
+    def empty(self):
+        return self.image is None
+
+    @property
+    def fill_ratio(self):
+        return self.filled / self.area if self.area > 0 else 0
+
+class QuadrantAnalysis(QuadrantRegion):
+    """
+    Contour measurements for one quadrant, extracted in a single pass.
+    
+    Contours, bounding rects, areas, moments and approximated polylines are
+    computed once here and read by both digit classification and segment
+    extraction.
+    """
+
+    def __init__(self, binary_image, quadrant_coords):
+        super().__init__(binary_image, quadrant_coords)
+        self.contours = ()
+        self.rects = []
+        self.areas = []
+        self.moments = []
+        self.polylines = []
+
+        if self.empty:
+            return
 
-    num_contours = len(contours)
-    horizontal_lines = 0
-    vertical_lines = 0
-    diagonal_lines = 0
-    rectangles = 0
+        self.contours, _ = cv2.findContours(self.image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contour in self.contours:
+            self.rects.append(cv2.boundingRect(contour))
+            self.areas.append(cv2.contourArea(contour))
+            self.moments.append(cv2.moments(contour))
+            epsilon = 0.02 * cv2.arcLength(contour, True)
+            self.polylines.append(cv2.approxPolyDP(contour, epsilon, True))
 
-    q_height, q_width = quadrant_img.shape
-    quadrant_area = q_height * q_width
-    filled_area = np.sum(quadrant_img > 0)
-    fill_ratio = filled_area / quadrant_area if quadrant_area > 0 else 0
+    @property
+    def count(self):
+        return len(self.contours)
 
-    for contour in contours:
-        x, y, w, h = cv2.boundingRect(contour)
+class QuadrantComponents(QuadrantRegion):
+    """
+    Connected-component statistics for one quadrant.
+    
+    One connectedComponentsWithStats call labels every stroke (8-connected,
+    like the external contours) and yields bounding boxes, pixel areas and
+    centroids as arrays, so features are classified without a per-contour loop.
+    """
+
+    def __init__(self, binary_image, quadrant_coords):
+        super().__init__(binary_image, quadrant_coords)
+        self.stats = np.empty((0, 5), dtype=np.int32)
+        self.centroids = np.empty((0, 2))
+
+        if self.empty:
+            return
+
+        _, _, stats, centroids = cv2.connectedComponentsWithStats(self.image, connectivity=8)
+        self.stats = stats[1:]
+        self.centroids = centroids[1:]
+
+    @property
+    def count(self):
+        return len(self.stats)
+
+def analyze_quadrant(binary_image, quadrant_coords):
+    """Run the single contour pass for a quadrant. See QuadrantAnalysis."""
+    return QuadrantAnalysis(binary_image, quadrant_coords)
+
+def contour_features(analysis):
+    """
+    Count stroke shapes among the contours of an analysed quadrant.
+    
+    Args:
+        analysis: QuadrantAnalysis of the quadrant
+        
+    Returns:
+        Dictionary with horizontal, vertical, diagonal and rectangle counts,
+        the number of contours, fill ratio and total ink
+    """
+    features = {
+        "horizontal": 0,
+        "vertical": 0,
+        "diagonal": 0,
+        "rectangles": 0,
+        "contours": len(analysis.contours),
+        "fill_ratio": analysis.fill_ratio,
+        "ink": analysis.ink
+    }
+
+    for (_, _, w, h), area, approx in zip(analysis.rects, analysis.areas, analysis.polylines):
         aspect_ratio = w / h if h > 0 else 0
-        area = cv2.contourArea(contour)
 
         if aspect_ratio > 2.5:
-            horizontal_lines += 1
+            features["horizontal"] += 1
         elif aspect_ratio < 0.4:
-            vertical_lines += 1
-        elif 0.8 < aspect_ratio < 1.2 and area > 0.1 * quadrant_area:
-            rectangles += 1
+            features["vertical"] += 1
+        elif 0.8 < aspect_ratio < 1.2 and area > 0.1 * analysis.area:
+            features["rectangles"] += 1
 
-        epsilon = 0.02 * cv2.arcLength(contour, True)
-        approx = cv2.approxPolyDP(contour, epsilon, True)
         if len(approx) == 2:
             pt1, pt2 = approx[0][0], approx[1][0]
             dx = pt2[0] - pt1[0]
@@ -168,43 +518,87 @@ def detect_features_in_quadrant(binary_image, quadrant_coords):
 
             angle = abs(np.arctan2(dy, dx) * 180 / np.pi)
             if 30 < angle < 60 or 120 < angle < 150:
-                diagonal_lines += 1
+                features["diagonal"] += 1
 
-    logger.debug(f"Quadrant features: horiz={horizontal_lines}, vert={vertical_lines}, diag={diagonal_lines}, rect={rectangles}, contours={num_contours}, fill_ratio={fill_ratio:.2f}")
+    return features
 
-    quadrant_name = "unknown"
-    logger.debug(f"Processing quadrant: {quadrant_name}")
+def component_features(components):
+    """
+    Count stroke shapes among the connected components of a quadrant.
+    
+    Mirrors contour_features using the component stats: pixel area stands in
+    for contour area (a contour through pixel centres encloses ~85% of the
+    stroke's pixels), and a diagonal is a sparse, centred component whose box
+    aspect lies between tan(30) and tan(60) degrees.
+    
+    Args:
+        components: QuadrantComponents of the quadrant
+        
+    Returns:
+        Dictionary in the same form as contour_features
+    """
+    x, y, w, h, pixels = components.stats.T.astype(np.float64)
+    aspect_ratio = w / h
+
+    horizontal = aspect_ratio > 2.5
+    vertical = aspect_ratio < 0.4
+    rectangles = (aspect_ratio > 0.8) & (aspect_ratio < 1.2) & (pixels > 0.115 * components.area)
+
+    # Twice the centroid offset from the box centre, within 10% of the box size
+    off_x = np.abs(2 * components.centroids[:, 0] - (2 * x + w - 1))
+    off_y = np.abs(2 * components.centroids[:, 1] - (2 * y + h - 1))
+    diagonal = (
+        (aspect_ratio > TAN_30) & (aspect_ratio < TAN_60) & (pixels < 0.2 * w * h) &
+        (off_x <= 0.2 * w) & (off_y <= 0.2 * h)
+    )
+
+    return {
+        "horizontal": int(horizontal.sum()),
+        "vertical": int(vertical.sum()),
+        "diagonal": int(diagonal.sum()),
+        "rectangles": int(rectangles.sum()),
+        "contours": components.count,
+        "fill_ratio": components.fill_ratio,
+        "ink": components.ink
+    }
+
+def classify_features(features):
+    """
+    Map quadrant feature counts to a digit.
+    
+    Args:
+        features: Feature dictionary as returned by contour_features
+        
+    Returns:
+        Estimated digit for the quadrant
+    """
+    horizontal_lines = features["horizontal"]
+    vertical_lines = features["vertical"]
+    diagonal_lines = features["diagonal"]
+    rectangles = features["rectangles"]
+    num_contours = features["contours"]
+    fill_ratio = features["fill_ratio"]
 
     if fill_ratio < 0.02 or num_contours == 0:
-        logger.debug(f"Quadrant {quadrant_name} is mostly empty, returning 0")
         return 0
 
     if horizontal_lines >= 1 and vertical_lines == 0 and diagonal_lines == 0 and num_contours <= 2:
-        logger.debug(f"Detected digit 1 in {quadrant_name}")
         return 1
     if horizontal_lines >= 1 and vertical_lines >= 1 and fill_ratio < 0.2:
-        logger.debug(f"Detected digit 2 in {quadrant_name}")
         return 2
     if diagonal_lines >= 1 and horizontal_lines == 0 and vertical_lines == 0:
-        logger.debug(f"Detected digit 3 in {quadrant_name}")
         return 3
     if diagonal_lines >= 1 and horizontal_lines >= 1:
-        logger.debug(f"Detected digit 4 in {quadrant_name}")
         return 4
     if horizontal_lines >= 1 and vertical_lines >= 1 and fill_ratio > 0.15:
-        logger.debug(f"Detected digit 5 in {quadrant_name}")
         return 5
     if vertical_lines >= 1 and horizontal_lines == 0 and diagonal_lines == 0:
-        logger.debug(f"Detected digit 6 in {quadrant_name}")
         return 6
     if vertical_lines >= 1 and horizontal_lines >= 1 and num_contours <= 3:
-        logger.debug(f"Detected digit 7 in {quadrant_name}")
         return 7
     if horizontal_lines >= 1 and vertical_lines >= 1 and num_contours >= 2:
-        logger.debug(f"Detected digit 8 in {quadrant_name}")
         return 8
     if rectangles >= 1 or (fill_ratio > 0.25 and num_contours >= 3):
-        logger.debug(f"Detected digit 9 in {quadrant_name}")
         return 9
 
     if vertical_lines >= 1:
@@ -215,13 +609,124 @@ def detect_features_in_quadrant(binary_image, quadrant_coords):
         return 1
     elif fill_ratio > 0.1:
         return 5
-    if np.sum(quadrant_img) > 0:
-        logger.debug(f"Fallback: Detected digit 1 in {quadrant_name}")
+    if features["ink"] > 0:
         return 1
 
-    logger.debug(f"No digit detected in {quadrant_name}")
     return 0
 
+def quadrant_segments(analysis, digit):
+    """
+    Extract positions of segments that make up a digit from an analysed quadrant.
+
+    Args:
+        analysis: QuadrantAnalysis of the quadrant
+        digit: The recognized digit
+
+    Returns:
+        List of up to three segments (center, bbox, area), largest first
+    """
+    if digit == 0 or analysis.empty:
+        return []
+
+    ox, oy = analysis.origin
+    segments = []
+    for M, (x, y, w, h), area in zip(analysis.moments, analysis.rects, analysis.areas):
+        if M["m00"] != 0:
+            cx = int(M["m10"] / M["m00"]) + ox
+            cy = int(M["m01"] / M["m00"]) + oy
+            segments.append({
+                "center": (cx, cy),
+                "bbox": (x + ox, y + oy, w, h),
+                "area": area
+            })
+
+    segments.sort(key=lambda s: s["area"], reverse=True)
+    return segments[:3]
+
+def component_segments(components, digit):
+    """
+    Extract segment positions from the connected components of a quadrant.
+
+    Args:
+        components: QuadrantComponents of the quadrant
+        digit: The recognized digit
+
+    Returns:
+        List of up to three segments (center, bbox, area), largest first
+    """
+    if digit == 0 or components.empty:
+        return []
+
+    ox, oy = components.origin
+    order = np.argsort(-components.stats[:, cv2.CC_STAT_AREA], kind="stable")[:3]
+    return [
+        {
+            "center": (int(components.centroids[i, 0]) + ox, int(components.centroids[i, 1]) + oy),
+            "bbox": (int(x) + ox, int(y) + oy, int(w), int(h)),
+            "area": float(area)
+        }
+        for i in order
+        for x, y, w, h, area in [components.stats[i]]
+    ]
+
+# Feature extractor per heuristic engine: (quadrant analysis, feature counts, segments)
+QUADRANT_EXTRACTORS = {
+    "heuristic": (QuadrantAnalysis, contour_features, quadrant_segments),
+    "components": (QuadrantComponents, component_features, component_segments)
+}
+
+def classify_quadrant(analysis, extract_features=contour_features):
+    """
+    Determine the digit drawn in an analysed quadrant.
+
+    Args:
+        analysis: QuadrantAnalysis or QuadrantComponents of the quadrant
+        extract_features: Feature extractor matching the analysis type
+
+    Returns:
+        Estimated digit for the quadrant
+    """
+    if analysis.empty or analysis.ink < 100 or not analysis.count:
+        return 0
+    features = extract_features(analysis)
+    digit = classify_features(features)
+    _trace("quadrant", origin=analysis.origin, digit=digit, **features)
+    return digit
+
+def recognize_quadrants(binary_image, quadrants, engine="heuristic", timings=NULL_TIMER):
+    """
+    Classify all four quadrants with one of the feature-based engines.
+
+    Args:
+        binary_image: Preprocessed binary image
+        quadrants: Quadrant boxes keyed by quadrant name
+        engine: 'heuristic' (contours) or 'components' (connected components)
+        timings: StageTimer receiving the 'quadrants' and 'segments' stages
+
+    Returns:
+        Tuple (digits, segments) keyed by quadrant name
+    """
+    analyze, extract_features, extract_segments = QUADRANT_EXTRACTORS[engine]
+    with timings.stage("quadrants"):
+        analyses = {q: analyze(binary_image, quadrants[q]) for q in QUADRANTS}
+        digits = {q: classify_quadrant(analyses[q], extract_features) for q in QUADRANTS}
+    with timings.stage("segments"):
+        segments = {q: extract_segments(analyses[q], digits[q]) for q in QUADRANTS}
+    return digits, segments
+
+def detect_features_in_quadrant(binary_image, quadrant_coords):
+    """
+    Detect features in a specific quadrant to determine the digit.
+    
+    Args:
+        binary_image: Preprocessed binary image
+        quadrant_coords: (x1, y1, x2, y2) coordinates of the quadrant
+        
+    Returns:
+        Estimated digit for the quadrant
+    """
+    return classify_quadrant(analyze_quadrant(binary_image, quadrant_coords))
+
 def get_segment_positions(binary_image, quadrant_coords, digit):
     """
     Extract positions of segments that make up a digit.
@@ -236,100 +741,397 @@ def get_segment_positions(binary_image, quadrant_coords, digit):
     """
     if digit == 0:
         return []
+    return quadrant_segments(analyze_quadrant(binary_image, quadrant_coords), digit)
 
-    x1, y1, x2, y2 = map(int, quadrant_coords)
-    height, width = binary_image.shape
-    x1 = max(0, min(x1, width-1))
-    x2 = max(0, min(x2, width))
-    y1 = max(0, min(y1, height-1))
-    y2 = max(0, min(y2, height))
+def locate_stem(binary_image):
+    """
+    Locate the vertical stem and the size of the digit marks in a binary image.
+    
+    The stem is the centre of the columns with the most ink; the symbol size is
+    how far ink reaches sideways from it, which every digit except 6 spans in full.
+    
+    Args:
+        binary_image: Preprocessed binary image
+        
+    Returns:
+        Tuple of (stem_x, stem_top, stem_bottom, symbol_size), or None if the image is empty
+    """
+    stems, valid = locate_stems(binary_image[None])
+    if not valid[0]:
+        return None
+    return tuple(int(value) for value in stems[0])
 
-    if x2 <= x1 or y2 <= y1:
-        return []
+# Stem length of the renderer's symbol layout at the preprocessing size, for
+# scaling SYMBOL_SIZE to images where no digit reaches out from the stem
+_LAYOUT_GEOMETRY = symbol_geometry(*PREPROCESS_SIZE)
+LAYOUT_STEM_LENGTH = _LAYOUT_GEOMETRY.stem_bottom - _LAYOUT_GEOMETRY.stem_top
 
-    quadrant_img = binary_image[y1:y2, x1:x2]
-    contours, _ = cv2.findContours(quadrant_img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+def locate_stems(binaries):
+    """
+    Vectorized locate_stem over a stack of binary images.
+    
+    Args:
+        binaries: Array of shape (N, H, W)
+        
+    Returns:
+        Tuple of (stems, valid): an (N, 4) array of (stem_x, stem_top, stem_bottom,
+        symbol_size) and a boolean array marking images that contain any ink
+    """
+    n, height, width = binaries.shape
+    rows = np.arange(n)
+    
+    column_ink = np.count_nonzero(binaries, axis=1)
+    peak = column_ink.max(axis=1)
+    valid = peak > 0
+    
+    stem_columns = column_ink >= (peak * 3 // 4)[:, None]
+    stem_x = (np.argmax(stem_columns, axis=1) + width - 1 - np.argmax(stem_columns[:, ::-1], axis=1)) // 2
+    
+    stem_column = binaries[rows, :, stem_x] > 0
+    stem_top = np.argmax(stem_column, axis=1)
+    stem_bottom = height - 1 - np.argmax(stem_column[:, ::-1], axis=1)
+    
+    inked = column_ink > 0
+    first = np.argmax(inked, axis=1)
+    last = width - 1 - np.argmax(inked[:, ::-1], axis=1)
+    stem_band = np.maximum(3, np.count_nonzero(column_ink >= (peak // 2)[:, None], axis=1))
+    reach = np.maximum(stem_x - first, last - stem_x)
+    reach = np.where(reach <= stem_band, (stem_bottom - stem_top) * SYMBOL_SIZE // LAYOUT_STEM_LENGTH, reach)
+    
+    stems = np.stack([stem_x, stem_top, stem_bottom, np.maximum(reach, 1)], axis=1)
+    return stems, valid
 
-    if not contours:
-        return []
+def template_quadrant_boxes(stem):
+    """
+    Compute the (x1, y1, x2, y2) box each quadrant's digit marks occupy.
+    
+    Args:
+        stem: (stem_x, stem_top, stem_bottom, symbol_size) from locate_stem
+        
+    Returns:
+        Dictionary of quadrant name to box
+    """
+    boxes = quadrant_box_array(np.asarray(stem)[None])[0]
+    return {quadrant: tuple(int(v) for v in boxes[q]) for q, quadrant in enumerate(QUADRANTS)}
 
-    segments = []
-    for contour in contours:
-        M = cv2.moments(contour)
-        if M["m00"] != 0:
-            cx = int(M["m10"] / M["m00"]) + x1
-            cy = int(M["m01"] / M["m00"]) + y1
-            x, y, w, h = cv2.boundingRect(contour)
-            x += x1
-            y += y1
-            segments.append({
-                "center": (cx, cy),
-                "bbox": (x, y, w, h),
-                "area": cv2.contourArea(contour)
-            })
+def quadrant_box_array(stems):
+    """
+    Vectorized template_quadrant_boxes.
+    
+    Args:
+        stems: (N, 4) array from locate_stems
+        
+    Returns:
+        Array of shape (N, 4, 4) with (x1, y1, x2, y2) per image and quadrant, in QUADRANTS order
+    """
+    stem_x, stem_top, stem_bottom, size = stems.T
+    pad = np.maximum(2, size // 5)
+    boxes = np.empty((len(stems), len(QUADRANTS), 4), np.int64)
+    for q, quadrant in enumerate(QUADRANTS):
+        if 'right' in quadrant:
+            boxes[:, q, 0], boxes[:, q, 2] = stem_x - pad, stem_x + size + pad
+        else:
+            boxes[:, q, 0], boxes[:, q, 2] = stem_x - size - pad, stem_x + pad
+        if 'top' in quadrant:
+            boxes[:, q, 1], boxes[:, q, 3] = stem_top - pad, stem_top + size + pad
+        else:
+            boxes[:, q, 1], boxes[:, q, 3] = stem_bottom - size - pad, stem_bottom + pad
+    return boxes
 
-    segments.sort(key=lambda s: s["area"], reverse=True)
-    return segments[:3]
+def sample_quadrants(binaries, boxes):
+    """
+    Scale every quadrant box of every image to TEMPLATE_SIZE x TEMPLATE_SIZE in one pass.
+    
+    Each output cell is the ink fraction of its source area, read from one
+    multi-channel integral image, so no per-crop resize is needed; area outside the image
+    counts as empty. The result is smoothed with a 3x3 Gaussian.
+    
+    Args:
+        binaries: Array of shape (N, H, W), N at most BATCH_PLANES
+        boxes: Array of shape (N, Q, 4) from quadrant_box_array
+        
+    Returns:
+        Array of shape (N, Q, TEMPLATE_SIZE * TEMPLATE_SIZE) with values in [0, 1]
+    """
+    n, height, width = binaries.shape
+    planes = np.ascontiguousarray(np.moveaxis(binaries, 0, 2)) // 255
+    integral = np.moveaxis(cv2.integral(planes).reshape(height + 1, width + 1, n), 2, 0)
+    
+    steps = np.arange(TEMPLATE_SIZE + 1) / TEMPLATE_SIZE
+    x1, y1, x2, y2 = (boxes[..., i, None] for i in range(4))
+    xs = np.rint(x1 + (x2 - x1) * steps).astype(np.int64)
+    ys = np.rint(y1 + (y2 - y1) * steps).astype(np.int64)
+    
+    image_index = np.arange(n)[:, None, None, None]
+    corners = integral[image_index, np.clip(ys, 0, height)[..., :, None], np.clip(xs, 0, width)[..., None, :]]
+    ink = corners[..., 1:, 1:] - corners[..., :-1, 1:] - corners[..., 1:, :-1] + corners[..., :-1, :-1]
+    area = np.diff(ys, axis=-1)[..., :, None] * np.diff(xs, axis=-1)[..., None, :]
+    cells = ink / np.maximum(area, 1)
+    
+    cells = _separable_filter(cells.astype(np.float32), np.array([0.25, 0.5, 0.25], np.float32), "reflect")
+    return cells.reshape(n, boxes.shape[1], -1)
+
+def _separable_filter(stack, kernel, mode):
+    """Convolve the last two axes of a stack with a symmetric 1-D kernel (numpy.pad border mode)."""
+    radius = len(kernel) // 2
+    pad = [(0, 0)] * (stack.ndim - 2)
+    for axis in (-2, -1):
+        padding = pad + ([(radius, radius), (0, 0)] if axis == -2 else [(0, 0), (radius, radius)])
+        padded = np.pad(stack, padding, mode=mode)
+        length = stack.shape[axis]
+        result = np.zeros_like(stack)
+        for i, weight in enumerate(kernel):
+            result += weight * (padded[..., i:i + length, :] if axis == -2 else padded[..., i:i + length])
+        stack = result
+    return stack
 
-def recognize_cistercian_numeral(image):
+@functools.lru_cache(maxsize=1)
+def build_digit_templates():
+    """
+    Build the digit templates from the renderer's quadrant stamps.
+    
+    Every digit is rendered alone in its quadrant with the stamp renderer, run
+    through preprocess_image and sampled exactly like an input quadrant, so
+    templates and inputs share the same stroke width and framing.
+    
+    Returns:
+        Array of shape (4, 10, TEMPLATE_SIZE * TEMPLATE_SIZE), indexed by QUADRANTS order and digit
+    """
+    binaries = np.stack([
+        preprocess_image(render_cistercian_image(digit * 10 ** place, mode="stamp"), otsu_if_clean=True)
+        for place in range(len(QUADRANTS))
+        for digit in range(10)
+    ])
+    stems, _ = locate_stems(binaries)
+    samples = sample_quadrants(binaries, quadrant_box_array(stems))
+    
+    quadrant_index = np.repeat(np.arange(len(QUADRANTS)), 10)
+    templates = samples[np.arange(len(binaries)), quadrant_index].reshape(len(QUADRANTS), 10, -1)
+    templates.setflags(write=False)
+    return templates
+
+def score_templates(samples):
+    """
+    Score sampled quadrants against every digit template in one einsum.
+    
+    Scores are soft Dice coefficients, 1.0 for a perfect match.
+    
+    Args:
+        samples: Array of shape (N, 4, TEMPLATE_SIZE * TEMPLATE_SIZE) from sample_quadrants
+        
+    Returns:
+        Tuple of (digits, confidences), both of shape (N, 4)
+    """
+    templates = build_digit_templates()
+    overlap = np.einsum('nqk,qdk->nqd', samples, templates)
+    mass = np.einsum('nqk,nqk->nq', samples, samples)[..., None] + np.einsum('qdk,qdk->qd', templates, templates)
+    scores = 2 * overlap / np.maximum(mass, 1e-6)
+    
+    digits = np.argmax(scores, axis=2)
+    confidences = np.take_along_axis(scores, digits[..., None], axis=2)[..., 0]
+    return digits, confidences
+
+def match_quadrant_templates(binary_image):
+    """
+    Classify all four quadrants of one image against the digit templates.
+    
+    Args:
+        binary_image: Preprocessed binary image
+        
+    Returns:
+        Tuple of (digits, confidences, boxes), with digits and confidences keyed by quadrant name
+    """
+    stems, valid = locate_stems(binary_image[None])
+    if not valid[0]:
+        return ({q: 0 for q in QUADRANTS}, {q: 0.0 for q in QUADRANTS}, {})
+    
+    boxes = quadrant_box_array(stems)
+    digits, confidences = score_templates(sample_quadrants(binary_image[None], boxes))
+    
+    return (
+        {q: int(digits[0, i]) for i, q in enumerate(QUADRANTS)},
+        {q: round(float(confidences[0, i]), 4) for i, q in enumerate(QUADRANTS)},
+        {q: tuple(int(v) for v in boxes[0, i]) for i, q in enumerate(QUADRANTS)}
+    )
+
+def recognize_cistercian_numeral(image, engine="heuristic", debug=False, timings=NULL_TIMER):
     """
     Recognize a Cistercian numeral in the image and return the corresponding number with metadata.
 
     Args:
         image: Input image containing a Cistercian numeral
+        engine: 'heuristic' (contour features), 'components' (connected-component
+            features) or 'template' (renderer templates)
+        debug: Attach a stem/quadrant overlay and pass it to the debug sink
+        timings: StageTimer (see stage_timing) collecting per-stage timings
 
     Returns:
         Dictionary containing:
         - number: Recognized number (0-9999)
         - segments: Detected segment positions for each digit
+        - confidence: Per-digit match scores (template engine only)
+        - debug_image: Base64 PNG overlay (debug only)
     """
-    try:
-        binary_image = preprocess_image(image)
-        structure = find_stem_and_quadrants(binary_image)
-
-        if not structure:
-            logger.warning("Could not identify structure in the image")
-            return {
-                "number": 0,
-                "confidence": {"units": 0.0, "tens": 0.0, "hundreds": 0.0, "thousands": 0.0},
-                "segments": {"units": [], "tens": [], "hundreds": [], "thousands": []}
-            }
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown recognition engine: {engine}")
 
-        quadrants = structure['quadrants']
-        logger.debug(f"Quadrant coordinates: {quadrants}")
+    if engine == "template":
+        return recognize_with_templates(image, debug, timings)
 
-        units_digit = detect_features_in_quadrant(binary_image, quadrants['top-right'])
-        tens_digit = detect_features_in_quadrant(binary_image, quadrants['top-left'])
-        hundreds_digit = detect_features_in_quadrant(binary_image, quadrants['bottom-right'])
-        thousands_digit = detect_features_in_quadrant(binary_image, quadrants['bottom-left'])
+    try:
+        binary_image = preprocess_image(image, timings)
+        return _recognize_binary(binary_image, engine, debug, timings)
 
-        logger.debug(f"Detected digits: units={units_digit}, tens={tens_digit}, hundreds={hundreds_digit}, thousands={thousands_digit}")
+    except Exception as e:
+        logger.error(f"Error in Cistercian numeral recognition: {str(e)}")
+        return {
+            "number": 0,
+            "segments": {"units": [], "tens": [], "hundreds": [], "thousands": []}
+        }
+
+def _recognize_binary(binary_image, engine, debug=False, timings=NULL_TIMER):
+    """Feature-based recognition of a preprocessed binary image."""
+    with timings.stage("find_stem"):
+        structure = find_stem_and_quadrants(binary_image, debug)
 
-        segments = {
-            "units": get_segment_positions(binary_image, quadrants['top-right'], units_digit),
-            "tens": get_segment_positions(binary_image, quadrants['top-left'], tens_digit),
-            "hundreds": get_segment_positions(binary_image, quadrants['bottom-right'], hundreds_digit),
-            "thousands": get_segment_positions(binary_image, quadrants['bottom-left'], thousands_digit)
+    if not structure:
+        logger.warning("Could not identify structure in the image")
+        return {
+            "number": 0,
+            "confidence": {"units": 0.0, "tens": 0.0, "hundreds": 0.0, "thousands": 0.0},
+            "segments": {"units": [], "tens": [], "hundreds": [], "thousands": []}
         }
 
-        stem = structure['stem']
-        segments["stem"] = [(stem[0], stem[1]), (stem[2], stem[3])]
+    quadrants = structure['quadrants']
 
-        number = (
-            thousands_digit * 1000 +
-            hundreds_digit * 100 +
-            tens_digit * 10 +
-            units_digit
-        )
+    digits, digit_segments = recognize_quadrants(binary_image, quadrants, engine, timings)
+    units_digit = digits['top-right']
+    tens_digit = digits['top-left']
+    hundreds_digit = digits['bottom-right']
+    thousands_digit = digits['bottom-left']
 
-        return {
+    _trace("digits", engine=engine, units=units_digit, tens=tens_digit, hundreds=hundreds_digit, thousands=thousands_digit)
+
+    segments = {QUADRANT_PLACES[q]: digit_segments[q] for q in QUADRANTS}
+
+    stem = structure['stem']
+    segments["stem"] = [(stem[0], stem[1]), (stem[2], stem[3])]
+
+    number = (
+        thousands_digit * 1000 +
+        hundreds_digit * 100 +
+        tens_digit * 10 +
+        units_digit
+    )
+
+    result = {
+        "number": number,
+        "segments": segments
+    }
+    if debug:
+        with timings.stage("debug"):
+            _attach_debug_image(result, structure['debug_image'])
+    return result
+
+def recognize_with_templates(image, debug=False, timings=NULL_TIMER):
+    """Template-matching implementation of recognize_cistercian_numeral."""
+    try:
+        binary_image = preprocess_image(image, timings, otsu_if_clean=True)
+        with timings.stage("match_templates"):
+            digits, confidences, boxes = match_quadrant_templates(binary_image)
+
+        _trace("digits", engine="template", digits=digits, confidence=confidences)
+
+        with timings.stage("segments"):
+            segments = {
+                QUADRANT_PLACES[q]: get_segment_positions(binary_image, boxes[q], digits[q]) if boxes else []
+                for q in QUADRANTS
+            }
+            stem = locate_stem(binary_image)
+            if stem is not None:
+                segments["stem"] = [(stem[0], stem[1]), (stem[0], stem[2])]
+
+        number = sum(digits[q] * 10 ** place for place, q in enumerate(QUADRANTS))
+
+        result = {
             "number": number,
+            "confidence": {QUADRANT_PLACES[q]: confidences[q] for q in QUADRANTS},
             "segments": segments
         }
+        if debug:
+            with timings.stage("debug"):
+                stem_line = (stem[0], stem[1], stem[0], stem[2]) if stem is not None else None
+                _attach_debug_image(result, draw_debug_overlay(binary_image, stem_line, boxes or {}))
+        return result
 
     except Exception as e:
-        logger.error(f"Error in Cistercian numeral recognition: {str(e)}")
+        logger.error(f"Error in template Cistercian numeral recognition: {str(e)}")
         return {
             "number": 0,
+            "confidence": {"units": 0.0, "tens": 0.0, "hundreds": 0.0, "thousands": 0.0},
             "segments": {"units": [], "tens": [], "hundreds": [], "thousands": []}
-        }
\ No newline at end of file
+        }
+
+def recognize_batch(images, engine="heuristic", include_segments=True):
+    """
+    Recognize a batch of Cistercian numerals.
+    
+    Images are processed BATCH_PLANES at a time. Preprocessing is vectorized
+    as in preprocess_batch and produces the same binaries as preprocess_image;
+    with the template engine, stem location, quadrant sampling and template
+    scoring are vectorized across images too, while the feature-based engines
+    classify each preprocessed image in turn.
+    
+    Args:
+        images: Sequence of images or an (N, H, W) array
+        engine: 'heuristic', 'components' or 'template'
+        include_segments: Include 'segments'; turning it off skips the
+            template engine's contour pass per quadrant
+        
+    Returns:
+        List of the dictionaries recognize_cistercian_numeral returns for each
+        image, in input order. Unlike recognize_cistercian_numeral, errors are
+        raised rather than reported as number 0.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown recognition engine: {engine}")
+
+    results = []
+    for start in range(0, len(images), BATCH_PLANES):
+        planes = _preprocess_planes(_stack_planes(images[start:start + BATCH_PLANES]), engine == "template")
+        binaries = np.moveaxis(planes, 2, 0)
+        if engine == "template":
+            results.extend(_recognize_binaries_with_templates(binaries, include_segments))
+        else:
+            for binary in binaries:
+                result = _recognize_binary(np.ascontiguousarray(binary), engine)
+                if not include_segments:
+                    result.pop("segments")
+                results.append(result)
+    return results
+
+def _recognize_binaries_with_templates(binaries, include_segments):
+    stems, valid = locate_stems(binaries)
+    boxes = quadrant_box_array(stems)
+    digits, confidences = score_templates(sample_quadrants(binaries, boxes))
+    digits[~valid] = 0
+    confidences[~valid] = 0.0
+    numbers = digits @ (10 ** np.arange(len(QUADRANTS)))
+
+    results = []
+    for i in range(len(binaries)):
+        result = {
+            "number": int(numbers[i]),
+            "confidence": {QUADRANT_PLACES[q]: round(float(confidences[i, j]), 4) for j, q in enumerate(QUADRANTS)}
+        }
+        if include_segments:
+            binary = np.ascontiguousarray(binaries[i])
+            result["segments"] = {
+                QUADRANT_PLACES[q]: get_segment_positions(binary, boxes[i, j], digits[i, j]) if valid[i] else []
+                for j, q in enumerate(QUADRANTS)
+            }
+            if valid[i]:
+                stem_x, stem_top, stem_bottom = (int(value) for value in stems[i, :3])
+                result["segments"]["stem"] = [(stem_x, stem_top), (stem_x, stem_bottom)]
+        results.append(result)
+    return results
@@ -1,47 +1,262 @@
 import cv2
 import numpy as np
 import base64
+import functools
+import io
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+from PIL import Image
 
-def decode_base64_image(base64_str):
-    """Decode a base64 image string to a numpy array."""
+RENDERER_VERSION = "1"
+
+ATLAS_DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+RENDER_CACHE_DEFAULT_SIZE = 1024
+
+SYMBOL_SIZE = 50
+
+# Smallest decode that still covers the recognizer's 300x400 working size
+DECODE_MIN_SIZE = (300, 400)
+
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2)
+)
+
+EXIF_ORIENTATION = 0x0112
+
+JPEG_MAGIC = b'\xff\xd8\xff'
+
+# Encoded image formats and their content types. 'png1' is a 1-bit PNG and
+# 'pbm' a raw (P4) portable bitmap; both threshold the glyph at mid-grey.
+IMAGE_FORMATS = {
+    "png": "image/png",
+    "png1": "image/png",
+    "webp": "image/webp",
+    "pbm": "image/x-portable-bitmap",
+}
+
+QUADRANTS = ('top-right', 'top-left', 'bottom-right', 'bottom-left')
+
+# Canvas size, stroke thickness, symbol scale and stem margin of a rendering.
+# thickness and margin default to values proportional to the canvas, and
+# scale multiplies the default symbol size; None means the layout default.
+RenderOptions = namedtuple(
+    "RenderOptions",
+    ["width", "height", "thickness", "scale", "margin"],
+    defaults=(300, 400, None, 1.0, None)
+)
+
+DEFAULT_RENDER_OPTIONS = RenderOptions()
+
+Geometry = namedtuple("Geometry", ["center_x", "stem_top", "stem_bottom", "thickness", "symbol_size"])
+
+def decode_base64_image(base64_str, min_size=DECODE_MIN_SIZE):
+    """Decode a base64 image string to a numpy array. See decode_image_bytes."""
     if ',' in base64_str:
         base64_str = base64_str.split(',')[1]
     
     img_data = base64.b64decode(base64_str)
     
-    nparr = np.frombuffer(img_data, np.uint8)
+    return decode_image_bytes(img_data, min_size)
+
+def decode_image_bytes(img_data, min_size=DECODE_MIN_SIZE):
+    """
+    Decode encoded image bytes (PNG, JPEG, ...) to a grayscale numpy array, or None.
     
-    img = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
+    JPEGs much larger than min_size are decoded at 1/2, 1/4 or 1/8 scale.
+    libjpeg scales while decoding, so the full-size bitmap is never
+    allocated. Other formats are decoded at full resolution, since
+    OpenCV would decode them fully before reducing anyway.
+    
+    Args:
+        img_data: Encoded image bytes
+        min_size: (width, height) the decoded image must still cover, or None
+            to always decode at full resolution
+    """
+    nparr = np.frombuffer(img_data, np.uint8)
+    if nparr.size == 0:
+        return None
+    
+    flag = cv2.IMREAD_GRAYSCALE
+    if min_size is not None and img_data[:3] == JPEG_MAGIC:
+        size = image_header_size(img_data)
+        if size is not None:
+            flag = reduced_decode_flag(size, min_size)
+    
+    img = cv2.imdecode(nparr, flag)
+    if img is None and flag != cv2.IMREAD_GRAYSCALE:
+        img = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
     return img
 
+def image_header_size(img_data):
+    """
+    Read the displayed (width, height) of an encoded image from its header.
+    
+    Only the header is parsed. For JPEG, an EXIF orientation that rotates
+    by 90 degrees swaps the dimensions, because imdecode applies it.
+    Returns None if the format is not recognized.
+    """
+    try:
+        with Image.open(io.BytesIO(img_data)) as header:
+            width, height = header.size
+            # Other formats may keep EXIF after the pixel data; reading it would decode them
+            if header.format in ("JPEG", "MPO") and header.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+                width, height = height, width
+            return width, height
+    except Exception:
+        return None
+
+def reduced_decode_flag(size, min_size=DECODE_MIN_SIZE):
+    """
+    Pick the imdecode flag with the largest reduction that still covers min_size.
+    
+    Args:
+        size: (width, height) of the encoded image
+        min_size: (width, height) the decoded image must cover
+        
+    Returns:
+        cv2.IMREAD_REDUCED_GRAYSCALE_8/4/2, or cv2.IMREAD_GRAYSCALE
+    """
+    width, height = size
+    min_width, min_height = min_size
+    for factor, flag in REDUCED_DECODE_FLAGS:
+        if width // factor >= min_width and height // factor >= min_height:
+            return flag
+    return cv2.IMREAD_GRAYSCALE
+
+def encode_image_to_png(img, compression=None):
+    """Encode a numpy array image to raw PNG bytes, optionally with a zlib compression level (0-9)."""
+    params = [] if compression is None else [cv2.IMWRITE_PNG_COMPRESSION, int(compression)]
+    _, buffer = cv2.imencode('.png', img, params)
+    return buffer.tobytes()
+
+def encode_image(img, fmt="png", compression=None):
+    """
+    Encode a grayscale image in one of the IMAGE_FORMATS.
+    
+    Args:
+        img: Grayscale image
+        fmt: 'png', 'png1' (1-bit PNG), 'webp' (lossless) or 'pbm' (raw bitmap)
+        compression: PNG compression level (0-9), used by 'png' and 'png1'
+        
+    Returns:
+        Encoded image bytes
+    """
+    if fmt == "png":
+        return encode_image_to_png(img, compression)
+    if fmt == "png1":
+        buffer = io.BytesIO()
+        bitmap = Image.fromarray(img).convert("1", dither=Image.Dither.NONE)
+        bitmap.save(buffer, "PNG", compress_level=6 if compression is None else int(compression))
+        return buffer.getvalue()
+    if fmt == "webp":
+        _, buffer = cv2.imencode('.webp', img, [cv2.IMWRITE_WEBP_QUALITY, 101])
+        return buffer.tobytes()
+    if fmt == "pbm":
+        height, width = img.shape
+        header = f"P4\n{width} {height}\n".encode("ascii")
+        return header + np.packbits(img < 128, axis=1).tobytes()
+    raise ValueError(f"Unsupported image format: {fmt}")
+
+def profile_encodings(img, formats=None, compression=None, repeat=5):
+    """
+    Measure the encode latency and output size of each image format.
+    
+    Args:
+        img: Grayscale image
+        formats: Formats to measure, defaults to all IMAGE_FORMATS
+        compression: PNG compression level passed to encode_image
+        repeat: Number of encodes per format; the fastest one is reported
+        
+    Returns:
+        List of dictionaries with format, mimetype, bytes and encode_ms
+    """
+    report = []
+    for fmt in formats or IMAGE_FORMATS:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = encode_image(img, fmt, compression)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        report.append({
+            "format": fmt,
+            "mimetype": IMAGE_FORMATS[fmt],
+            "bytes": len(data),
+            "encode_ms": round(best * 1000, 4)
+        })
+    return report
+
+def png_to_base64(png_bytes):
+    """Wrap raw PNG bytes in a base64 data URI."""
+    img_str = base64.b64encode(png_bytes).decode('utf-8')
+    return f"data:image/png;base64,{img_str}"
+
 def encode_image_to_base64(img):
     """Encode a numpy array image to a base64 string."""
-    _, buffer = cv2.imencode('.png', img)
-    img_str = base64.b64encode(buffer).decode('utf-8')
-    return f"data:image/png;base64,{img_str}"
+    return png_to_base64(encode_image_to_png(img))
 
 def create_blank_image(width=300, height=400):
     """Create a blank white image with given dimensions."""
     img = np.ones((height, width), np.uint8) * 255
     return img
 
-def draw_cistercian_symbol(img, number):
+def make_render_options(width=300, height=400, thickness=None, scale=1.0, margin=None):
+    """
+    Build validated RenderOptions.
+    
+    Args:
+        width: Canvas width (8-4096)
+        height: Canvas height (8-4096)
+        thickness: Stroke thickness in pixels (1-64), or None for the default
+        scale: Symbol size multiplier (0-4]
+        margin: Distance from the canvas edges to the stem ends, or None for the default
+        
+    Returns:
+        RenderOptions
+    """
+    width, height = _convert_option(width, "Width", int), _convert_option(height, "Height", int)
+    if not (8 <= width <= 4096 and 8 <= height <= 4096):
+        raise ValueError("Width and height must be between 8 and 4096")
+    if thickness is not None:
+        thickness = _convert_option(thickness, "Thickness", int)
+        if not 1 <= thickness <= 64:
+            raise ValueError("Thickness must be between 1 and 64")
+    scale = _convert_option(scale, "Scale", float)
+    if not 0 < scale <= 4:
+        raise ValueError("Scale must be greater than 0 and at most 4")
+    if margin is not None:
+        margin = _convert_option(margin, "Margin", int)
+        if not 0 <= margin < height // 2:
+            raise ValueError("Margin must be at least 0 and less than half the height")
+    return RenderOptions(width, height, thickness, scale, margin)
+
+def _convert_option(value, name, convert):
+    # Request parameters arrive as strings or arbitrary JSON values
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        kind = "an integer" if convert is int else "a number"
+        raise ValueError(f"{name} must be {kind}") from None
+
+def draw_cistercian_symbol(img, number, options=None):
     """
     Draw a Cistercian numeral on the image for the given number (0-9999).
     
     The Cistercian numeral system uses a vertical stem with different marks
     in four quadrants to represent units, tens, hundreds, and thousands.
+    The canvas size comes from the image; thickness, scale and margin from options.
     """
     if number < 0 or number > 9999:
         raise ValueError("Number must be between 0 and 9999")
     
     height, width = img.shape
-    center_x = width // 2
-    center_y = height // 2
-    stem_height = int(height // 1.5)
-    stem_top = int(center_y - stem_height // 2)
-    stem_bottom = int(center_y + stem_height // 2)
-    line_thickness = 3
+    center_x, stem_top, stem_bottom, line_thickness, symbol_size = symbol_geometry(width, height, options)
     
     cv2.line(img, (center_x, stem_top), (center_x, stem_bottom), 0, line_thickness)
     
@@ -50,126 +265,305 @@ def draw_cistercian_symbol(img, number):
     hundreds = (number // 100) % 10
     thousands = (number // 1000) % 10
     
-    draw_digit(img, units, center_x, stem_top, 'top-right', line_thickness)
-    draw_digit(img, tens, center_x, stem_top, 'top-left', line_thickness)
-    draw_digit(img, hundreds, center_x, stem_bottom, 'bottom-right', line_thickness)
-    draw_digit(img, thousands, center_x, stem_bottom, 'bottom-left', line_thickness)
+    draw_digit(img, units, center_x, stem_top, 'top-right', line_thickness, symbol_size)
+    draw_digit(img, tens, center_x, stem_top, 'top-left', line_thickness, symbol_size)
+    draw_digit(img, hundreds, center_x, stem_bottom, 'bottom-right', line_thickness, symbol_size)
+    draw_digit(img, thousands, center_x, stem_bottom, 'bottom-left', line_thickness, symbol_size)
     
     return img
 
-def draw_digit(img, digit, center_x, y_pos, quadrant, thickness):
+def symbol_geometry(width, height, options=None):
+    """
+    Compute the stem placement used by draw_cistercian_symbol.
+    
+    Returns:
+        Geometry(center_x, stem_top, stem_bottom, thickness, symbol_size)
+    """
+    center_y = height // 2
+    stem_height = int(height // 1.5)
+    stem_top = int(center_y - stem_height // 2)
+    stem_bottom = int(center_y + stem_height // 2)
+    return _resolve_geometry(width, height, options, stem_top, stem_bottom)
+
+def _resolve_geometry(width, height, options, stem_top, stem_bottom):
+    options = options or DEFAULT_RENDER_OPTIONS
+    
+    if options.margin is not None:
+        stem_top = options.margin
+        stem_bottom = height - options.margin
+    
+    thickness = options.thickness
+    if thickness is None:
+        thickness = max(1, round(3 * height / 400))
+    
+    symbol_size = max(1, round(options.scale * SYMBOL_SIZE * min(width / 300, height / 400)))
+    
+    return Geometry(width // 2, stem_top, stem_bottom, thickness, symbol_size)
+
+def draw_digit(img, digit, center_x, y_pos, quadrant, thickness, symbol_size=SYMBOL_SIZE):
     """
     Draw a digit (0-9) in the specified quadrant according to Cistercian numeral system.
     quadrant: 'top-left', 'top-right', 'bottom-left', 'bottom-right'
     """
-    if digit == 0:
-        return
-    
-    center_x = int(center_x)
-    y_pos = int(y_pos)
+    for stroke in get_digit_strokes(digit, quadrant, int(center_x), int(y_pos), symbol_size):
+        cv2.line(img, stroke.start, stroke.end, 0, thickness)
+
+Stroke = namedtuple("Stroke", ["type", "start", "end"])
+
+# Strokes of each digit relative to the end of the stem, as (type, start, end).
+# A point (a, b) lies a * symbol_size away from the stem and b * symbol_size
+# towards the centre of the numeral.
+DIGIT_STROKES = MappingProxyType({
+    0: (),
+    1: (("horizontal", (0, 0), (1, 0)),),
+    2: (("horizontal", (0, 0), (1, 0)), ("vertical", (1, 0), (1, 1))),
+    3: (("diagonal", (0, 0), (1, 1)),),
+    4: (("diagonal", (0, 0), (1, 1)), ("vertical", (1, 1), (1, 0))),
+    5: (("diagonal", (0, 0), (1, 1)), ("horizontal", (1, 1), (0, 1))),
+    6: (("vertical", (0, 0), (0, 1)),),
+    7: (("vertical", (0, 0), (0, 1)), ("horizontal", (0, 1), (1, 1))),
+    8: (("horizontal", (0, 0), (1, 0)), ("vertical", (1, 0), (1, 1))),
+    9: (("horizontal", (0, 0), (1, 0)), ("vertical", (1, 0), (1, 1)), ("horizontal", (1, 1), (0, 1))),
+})
+
+@functools.lru_cache(maxsize=4096)
+def get_digit_strokes(digit, quadrant, center_x, y_pos, symbol_size=SYMBOL_SIZE):
+    """
+    Look up the absolute strokes of a digit in a quadrant.
     
+    Args:
+        digit: Digit (0-9)
+        quadrant: Quadrant to draw in ('top-left', 'top-right', 'bottom-left', 'bottom-right')
+        center_x: X-coordinate of stem
+        y_pos: Y-coordinate of the stem end the digit hangs from
+        symbol_size: Width and height of the digit marks
+        
+    Returns:
+        Tuple of Stroke(type, start, end) with integer (x, y) endpoints
+    """
     x_dir = 1 if 'right' in quadrant else -1
     y_dir = 1 if 'bottom' in quadrant else -1
     
-    symbol_size = 50
+    def point(offset):
+        return (int(center_x + offset[0] * x_dir * symbol_size), int(y_pos - offset[1] * y_dir * symbol_size))
     
+    return tuple(
+        Stroke(stroke_type, point(start), point(end))
+        for stroke_type, start, end in DIGIT_STROKES[digit]
+    )
+
+QuadrantStamp = namedtuple("QuadrantStamp", ["y", "x", "mask"])
+
+StampSet = namedtuple("StampSet", ["width", "height", "stem", "digits"])
+
+@functools.lru_cache(maxsize=16)
+def build_quadrant_stamps(options=DEFAULT_RENDER_OPTIONS):
+    """
+    Precompute the stem and the 40 quadrant stamps (digit x quadrant) for a rendering.
+    
+    Each stamp is the smallest patch of a full-size rendering that contains the
+    marks of one digit in one quadrant, so compositing stamps with np.minimum
+    reproduces draw_cistercian_symbol pixel for pixel.
     
-    if digit == 1:
-        end_x = int(center_x + x_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (end_x, y_pos), 0, thickness)
+    Args:
+        options: RenderOptions (canvas size, thickness, scale and margin)
+        
+    Returns:
+        StampSet with the stem stamp and a {(digit, quadrant): QuadrantStamp} mapping
+        (digit 0 maps to None)
+    """
+    width, height = options.width, options.height
+    center_x, stem_top, stem_bottom, line_thickness, symbol_size = symbol_geometry(width, height, options)
     
-    elif digit == 2:
-        horiz_end_x = int(center_x + x_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (horiz_end_x, y_pos), 0, thickness)
+    img = create_blank_image(width, height)
+    cv2.line(img, (center_x, stem_top), (center_x, stem_bottom), 0, line_thickness)
+    stem = _crop_stamp(img)
+    
+    digits = {}
+    for quadrant in QUADRANTS:
+        y_pos = stem_top if 'top' in quadrant else stem_bottom
+        digits[(0, quadrant)] = None
+        for digit in range(1, 10):
+            img = create_blank_image(width, height)
+            draw_digit(img, digit, center_x, y_pos, quadrant, line_thickness, symbol_size)
+            digits[(digit, quadrant)] = _crop_stamp(img)
+    
+    return StampSet(width, height, stem, MappingProxyType(digits))
+
+def _crop_stamp(img):
+    ys, xs = np.nonzero(img < 255)
+    if len(ys) == 0:
+        return None
+    y0, y1 = ys.min(), ys.max() + 1
+    x0, x1 = xs.min(), xs.max() + 1
+    mask = img[y0:y1, x0:x1].copy()
+    mask.setflags(write=False)
+    return QuadrantStamp(int(y0), int(x0), mask)
+
+def _blit_stamp(img, stamp):
+    if stamp is None:
+        return
+    h, w = stamp.mask.shape
+    region = img[stamp.y:stamp.y + h, stamp.x:stamp.x + w]
+    np.minimum(region, stamp.mask, out=region)
 
-        vert_end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (horiz_end_x, y_pos), (horiz_end_x, vert_end_y), 0, thickness)
+def composite_cistercian_symbol(img, number, options=None):
+    """
+    Draw a Cistercian numeral by compositing precomputed quadrant stamps.
     
-    elif digit == 3:
-        end_x = int(center_x + x_dir * symbol_size)
-        end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (end_x, end_y), 0, thickness)
+    Drop-in replacement for draw_cistercian_symbol that produces identical pixels
+    with a handful of np.minimum blits instead of one cv2.line per stroke.
+    """
+    if number < 0 or number > 9999:
+        raise ValueError("Number must be between 0 and 9999")
     
-    elif digit == 4:
-        end_x = int(center_x + x_dir * symbol_size)
-        end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (end_x, end_y), 0, thickness)
-        cv2.line(img, (end_x, end_y), (end_x, y_pos), 0, thickness)
+    height, width = img.shape
+    options = (options or DEFAULT_RENDER_OPTIONS)._replace(width=width, height=height)
+    stamps = build_quadrant_stamps(options)
     
-    elif digit == 5:
-        end_x = int(center_x + x_dir * symbol_size)
-        end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (end_x, end_y), 0, thickness)
-        cv2.line(img, (end_x, end_y), (center_x, end_y), 0, thickness)
+    _blit_stamp(img, stamps.stem)
+    for quadrant, digit in zip(QUADRANTS, split_digits(number)):
+        _blit_stamp(img, stamps.digits[(digit, quadrant)])
     
-    elif digit == 6:
-        vert_end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (center_x, vert_end_y), 0, thickness)
+    return img
+
+def render_batch(numbers, options=None):
+    """
+    Render many Cistercian numerals into one image stack.
     
-    elif digit == 7:
-        vert_end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (center_x, vert_end_y), 0, thickness)
-        horiz_end_x = int(center_x + x_dir * symbol_size)
-        cv2.line(img, (center_x, vert_end_y), (horiz_end_x, vert_end_y), 0, thickness)
+    Stamps are composited across the whole batch at once: every image that has
+    the same digit in the same quadrant is updated by a single np.minimum call.
     
-    elif digit == 8:
-        horiz_end_x = int(center_x + x_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (horiz_end_x, y_pos), 0, thickness)
-        vert_end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (horiz_end_x, y_pos), (horiz_end_x, vert_end_y), 0, thickness)
+    Args:
+        numbers: Sequence of numbers to render (0-9999)
+        options: RenderOptions, defaults to DEFAULT_RENDER_OPTIONS
+        
+    Returns:
+        Array of shape (N, height, width) and dtype uint8, in input order
+    """
+    numbers = np.asarray(numbers, dtype=np.int64).reshape(-1)
+    if numbers.size and (numbers.min() < 0 or numbers.max() > 9999):
+        raise ValueError("Number must be between 0 and 9999")
     
-    elif digit == 9:
-        horiz_end_x = int(center_x + x_dir * symbol_size)
-        vert_end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (horiz_end_x, y_pos), 0, thickness)
-        cv2.line(img, (horiz_end_x, y_pos), (horiz_end_x, vert_end_y), 0, thickness)
-        cv2.line(img, (horiz_end_x, vert_end_y), (center_x, vert_end_y), 0, thickness)
+    options = options or DEFAULT_RENDER_OPTIONS
+    stamps = build_quadrant_stamps(options)
+    batch = np.full((len(numbers), options.height, options.width), 255, np.uint8)
+    if len(numbers) == 0:
+        return batch
+    
+    stem = stamps.stem
+    h, w = stem.mask.shape
+    region = batch[:, stem.y:stem.y + h, stem.x:stem.x + w]
+    np.minimum(region, stem.mask, out=region)
+    
+    for place, quadrant in enumerate(QUADRANTS):
+        digits = (numbers // 10 ** place) % 10
+        for digit in range(1, 10):
+            indices = np.flatnonzero(digits == digit)
+            stamp = stamps.digits[(digit, quadrant)]
+            if len(indices) == 0 or stamp is None:
+                continue
+            h, w = stamp.mask.shape
+            window = (indices, slice(stamp.y, stamp.y + h), slice(stamp.x, stamp.x + w))
+            batch[window] = np.minimum(batch[window], stamp.mask)
+    
+    return batch
 
+def split_digits(number):
+    """Split a number into its (units, tens, hundreds, thousands) digits."""
+    return (number % 10, (number // 10) % 10, (number // 100) % 10, (number // 1000) % 10)
 
-def number_to_cistercian_image(number):
+def number_to_cistercian_image(number, options=None):
     """
     Convert a number to a Cistercian numeral image and return as base64.
     
     Args:
         number: Number to convert (0-9999)
+        options: RenderOptions, defaults to DEFAULT_RENDER_OPTIONS
         
     Returns:
         Base64 encoded image
     """
+    return encode_image_to_base64(render_cistercian_image(number, options=options))
+
+def render_cistercian_image(number, mode="draw", options=None):
+    """
+    Render a Cistercian numeral to a raw grayscale image.
+    
+    Args:
+        number: Number to render (0-9999)
+        mode: 'draw' (cv2 strokes) or 'stamp' (precomputed quadrant stamps)
+        options: RenderOptions, defaults to DEFAULT_RENDER_OPTIONS
+        
+    Returns:
+        Numpy array with the rendered numeral
+    """
     if number < 0 or number > 9999:
         raise ValueError("Number must be between 0 and 9999")
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {mode}")
     
-    img = create_blank_image(300, 400)
+    options = options or DEFAULT_RENDER_OPTIONS
+    img = create_blank_image(options.width, options.height)
     
-    img = draw_cistercian_symbol(img, number)
-    
-    return encode_image_to_base64(img)
+    return RENDER_MODES[mode](img, number, options)
+
+RENDER_MODES = {
+    "draw": draw_cistercian_symbol,
+    "stamp": composite_cistercian_symbol,
+}
 
-def number_to_cistercian_with_segments(number):
+def number_to_cistercian_with_segments(number, options=None):
     """
     Convert a number to a Cistercian numeral image and return the image with segment positions.
     
     Args:
         number: Number to convert (0-9999)
+        options: RenderOptions, defaults to DEFAULT_RENDER_OPTIONS
         
     Returns:
         Dictionary containing:
         - image_data: Base64 encoded image
         - segments: Positions of segments for each digit
     """
-    if number < 0 or number > 9999:
-        raise ValueError("Number must be between 0 and 9999")
+    img, segments = render_cistercian_with_segments(number, options)
     
-    img = create_blank_image(300, 400)
-    
-    height, width = img.shape
-    center_x = width // 2
+    return {
+        "image_data": encode_image_to_base64(img),
+        "segments": segments
+    }
+
+def segments_geometry(width, height, options=None):
+    """
+    Compute the stem placement used by number_to_cistercian_with_segments.
     
+    Returns:
+        Geometry(center_x, stem_top, stem_bottom, thickness, symbol_size)
+    """
     stem_length = height // 2
     stem_top = height // 4
     stem_bottom = stem_top + stem_length
+    return _resolve_geometry(width, height, options, stem_top, stem_bottom)
+
+def render_cistercian_with_segments(number, options=None):
+    """
+    Render a Cistercian numeral to a raw grayscale image along with its segment positions.
     
-    line_thickness = 3
+    Args:
+        number: Number to render (0-9999)
+        options: RenderOptions, defaults to DEFAULT_RENDER_OPTIONS
+        
+    Returns:
+        Tuple of (image, segments)
+    """
+    if number < 0 or number > 9999:
+        raise ValueError("Number must be between 0 and 9999")
+    
+    options = options or DEFAULT_RENDER_OPTIONS
+    img = create_blank_image(options.width, options.height)
+    
+    height, width = img.shape
+    center_x, stem_top, stem_bottom, line_thickness, symbol_size = segments_geometry(width, height, options)
     
     cv2.line(img, (center_x, stem_top), (center_x, stem_bottom), 0, line_thickness)
     
@@ -187,23 +581,20 @@ def number_to_cistercian_with_segments(number):
     segments["thousands"] = []
     
     if units > 0:
-        segments["units"] = draw_digit_with_segments(img, units, center_x, stem_top, 'top-right', line_thickness)
+        segments["units"] = draw_digit_with_segments(img, units, center_x, stem_top, 'top-right', line_thickness, symbol_size)
     
     if tens > 0:
-        segments["tens"] = draw_digit_with_segments(img, tens, center_x, stem_top, 'top-left', line_thickness)
+        segments["tens"] = draw_digit_with_segments(img, tens, center_x, stem_top, 'top-left', line_thickness, symbol_size)
     
     if hundreds > 0:
-        segments["hundreds"] = draw_digit_with_segments(img, hundreds, center_x, stem_bottom, 'bottom-right', line_thickness)
+        segments["hundreds"] = draw_digit_with_segments(img, hundreds, center_x, stem_bottom, 'bottom-right', line_thickness, symbol_size)
     
     if thousands > 0:
-        segments["thousands"] = draw_digit_with_segments(img, thousands, center_x, stem_bottom, 'bottom-left', line_thickness)
+        segments["thousands"] = draw_digit_with_segments(img, thousands, center_x, stem_bottom, 'bottom-left', line_thickness, symbol_size)
     
-    return {
-        "image_data": encode_image_to_base64(img),
-        "segments": segments
-    }
+    return img, segments
 
-def draw_digit_with_segments(img, digit, center_x, y_pos, quadrant, thickness):
+def draw_digit_with_segments(img, digit, center_x, y_pos, quadrant, thickness, symbol_size=SYMBOL_SIZE):
     """
     Draw a digit and return the positions of its segments.
     
@@ -214,95 +605,358 @@ def draw_digit_with_segments(img, digit, center_x, y_pos, quadrant, thickness):
         y_pos: Y-coordinate of starting point
         quadrant: Quadrant to draw in ('top-left', 'top-right', 'bottom-left', 'bottom-right')
         thickness: Line thickness
+        symbol_size: Width and height of the digit marks
         
     Returns:
         List of segment positions [(x1,y1,x2,y2), ...]
     """
-    if digit == 0:
-        return []
+    strokes = get_digit_strokes(digit, quadrant, int(center_x), int(y_pos), symbol_size)
     
-    center_x = int(center_x)
-    y_pos = int(y_pos)
+    segments = []
+    for stroke in strokes:
+        cv2.line(img, stroke.start, stroke.end, 0, thickness)
+        segments.append(stroke._asdict())
     
-    x_dir = 1 if 'right' in quadrant else -1
-    y_dir = 1 if 'bottom' in quadrant else -1
+    return segments
+
+
+def number_to_cistercian_svg(number, size=400, options=None):
+    """
+    Convert a number to a Cistercian numeral as an SVG document.
     
-    symbol_size = 50
+    Uses the same stroke geometry as number_to_cistercian_with_segments, with
+    the canvas as view box, so the drawing scales to any resolution.
     
-    segments = []
+    Args:
+        number: Number to convert (0-9999)
+        size: Rendered height in pixels; the width keeps the canvas aspect ratio
+        options: RenderOptions, defaults to DEFAULT_RENDER_OPTIONS
+        
+    Returns:
+        SVG document as a string
+    """
+    if number < 0 or number > 9999:
+        raise ValueError("Number must be between 0 and 9999")
+    
+    options = options or DEFAULT_RENDER_OPTIONS
+    width, height = options.width, options.height
+    center_x, stem_top, stem_bottom, line_thickness, symbol_size = segments_geometry(width, height, options)
+    
+    path = [f"M{center_x} {stem_top}V{stem_bottom}"]
+    for quadrant, digit in zip(QUADRANTS, split_digits(number)):
+        y_pos = stem_top if 'top' in quadrant else stem_bottom
+        for stroke in get_digit_strokes(digit, quadrant, center_x, y_pos, symbol_size):
+            path.append(f"M{stroke.start[0]} {stroke.start[1]}L{stroke.end[0]} {stroke.end[1]}")
+    
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{round(size * width / height)}" height="{size}" '
+        f'viewBox="0 0 {width} {height}">'
+        f'<rect width="{width}" height="{height}" fill="#fff"/>'
+        f'<path d="{"".join(path)}" fill="none" stroke="#000" stroke-width="{line_thickness}" stroke-linecap="round"/>'
+        f'</svg>'
+    )
+
+AtlasEntry = namedtuple("AtlasEntry", ["image", "png", "segments"])
+
+SEGMENT_KEYS = ("stem", "units", "tens", "hundreds", "thousands")
+SEGMENT_TYPES = ("horizontal", "vertical", "diagonal")
+
+def pack_segments(segments):
+    """
+    Pack a segments dict into one read-only int16 array for compact storage.
     
-    if digit == 1:
-        end_x = int(center_x + x_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (end_x, y_pos), 0, thickness)
-        segments.append({"type": "horizontal", "start": (center_x, y_pos), "end": (end_x, y_pos)})
-    
-    elif digit == 2:
-        horiz_end_x = int(center_x + x_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (horiz_end_x, y_pos), 0, thickness)
-        segments.append({"type": "horizontal", "start": (center_x, y_pos), "end": (horiz_end_x, y_pos)})
-
-        vert_end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (horiz_end_x, y_pos), (horiz_end_x, vert_end_y), 0, thickness)
-        segments.append({"type": "vertical", "start": (horiz_end_x, y_pos), "end": (horiz_end_x, vert_end_y)})
-    
-    elif digit == 3:
-        end_x = int(center_x + x_dir * symbol_size)
-        end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (end_x, end_y), 0, thickness)
-        segments.append({"type": "diagonal", "start": (center_x, y_pos), "end": (end_x, end_y)})
-    
-    elif digit == 4:
-        end_x = int(center_x + x_dir * symbol_size)
-        end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (end_x, end_y), 0, thickness)
-        segments.append({"type": "diagonal", "start": (center_x, y_pos), "end": (end_x, end_y)})
+    Each row is (key index, type index, x1, y1, x2, y2), indexing SEGMENT_KEYS
+    and SEGMENT_TYPES; the stem row has type index -1.
+    """
+    (x1, y1), (x2, y2) = segments["stem"]
+    rows = [(0, -1, x1, y1, x2, y2)]
+    for key_index, key in enumerate(SEGMENT_KEYS[1:], 1):
+        for segment in segments[key]:
+            rows.append((key_index, SEGMENT_TYPES.index(segment["type"])) + segment["start"] + segment["end"])
+    packed = np.array(rows, dtype=np.int16)
+    packed.setflags(write=False)
+    return packed
+
+def unpack_segments(packed):
+    """Rebuild the segments dict returned by render_cistercian_with_segments from pack_segments output."""
+    segments = {key: [] for key in SEGMENT_KEYS}
+    for key_index, type_index, x1, y1, x2, y2 in packed.tolist():
+        if key_index == 0:
+            segments["stem"] = [(x1, y1), (x2, y2)]
+        else:
+            segments[SEGMENT_KEYS[key_index]].append({"type": SEGMENT_TYPES[type_index], "start": (x1, y1), "end": (x2, y2)})
+    return segments
+
+ATLAS_LAYOUTS = {
+    "symbol": lambda number, options: (render_cistercian_image(number, mode="stamp", options=options), None),
+    "segments": render_cistercian_with_segments,
+}
+
+class GlyphAtlas:
+    """
+    Precomputed store of rendered Cistercian glyphs for the whole 0-9999 domain.
+    
+    Each entry holds the raw pixels and/or the encoded PNG bytes of a glyph, so
+    a lookup replaces drawing and encoding. Entries are added eagerly on
+    construction or lazily on first lookup, and the total size of the stored
+    glyphs never exceeds ``max_bytes``; glyphs that do not fit are rendered on
+    demand instead. Segment positions are stored packed (see pack_segments)
+    and counted towards the cap.
+    
+    Args:
+        layout: 'symbol' (number_to_cistercian_image) or 'segments'
+            (number_to_cistercian_with_segments)
+        store: 'png', 'pixels' or 'both'
+        fill: 'lazy' or 'eager'
+        max_bytes: Memory cap for the stored glyphs
+        options: RenderOptions the glyphs are rendered with
+    """
+
+    def __init__(self, layout="symbol", store="png", fill="lazy", max_bytes=ATLAS_DEFAULT_MAX_BYTES,
+                 options=DEFAULT_RENDER_OPTIONS):
+        if layout not in ATLAS_LAYOUTS:
+            raise ValueError(f"Unknown atlas layout: {layout}")
+        if store not in ("png", "pixels", "both"):
+            raise ValueError(f"Unknown atlas store: {store}")
+        if fill not in ("lazy", "eager"):
+            raise ValueError(f"Unknown atlas fill mode: {fill}")
         
-        cv2.line(img, (end_x, end_y), (end_x, y_pos), 0, thickness)
-        segments.append({"type": "vertical", "start": (end_x, end_y), "end": (end_x, y_pos)})
-    
-    elif digit == 5:
-        end_x = int(center_x + x_dir * symbol_size)
-        end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (end_x, end_y), 0, thickness)
-        segments.append({"type": "diagonal", "start": (center_x, y_pos), "end": (end_x, end_y)})
+        self.layout = layout
+        self.store = store
+        self.fill_mode = fill
+        self.max_bytes = max_bytes
+        self.options = options
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self._render = ATLAS_LAYOUTS[layout]
+        self._entries = {}
+        self._lock = threading.Lock()
         
-        cv2.line(img, (end_x, end_y), (center_x, end_y), 0, thickness)
-        segments.append({"type": "horizontal", "start": (end_x, end_y), "end": (center_x, end_y)})
-    
-    elif digit == 6:
-        vert_end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (center_x, vert_end_y), 0, thickness)
-        segments.append({"type": "vertical", "start": (center_x, y_pos), "end": (center_x, vert_end_y)})
-    
-    elif digit == 7:
-        vert_end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (center_x, vert_end_y), 0, thickness)
-        segments.append({"type": "vertical", "start": (center_x, y_pos), "end": (center_x, vert_end_y)})
+        if fill == "eager":
+            self.fill()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, number):
+        return number in self._entries
+
+    def fill(self):
+        """Render every glyph into the atlas, stopping once the memory cap is reached."""
+        for number in range(10000):
+            if number in self._entries:
+                continue
+            entry = self._build_entry(number)
+            if not self._insert(number, entry):
+                break
+        return self
+
+    def get(self, number):
+        """
+        Look up a glyph, rendering and storing it if it is not in the atlas yet.
         
-        horiz_end_x = int(center_x + x_dir * symbol_size)
-        cv2.line(img, (center_x, vert_end_y), (horiz_end_x, vert_end_y), 0, thickness)
-        segments.append({"type": "horizontal", "start": (center_x, vert_end_y), "end": (horiz_end_x, vert_end_y)})
-    
-    elif digit == 8:
-        horiz_end_x = int(center_x + x_dir * symbol_size)
-        cv2.line(img, (center_x, y_pos), (horiz_end_x, y_pos), 0, thickness)
-        segments.append({"type": "horizontal", "start": (center_x, y_pos), "end": (horiz_end_x, y_pos)})
+        Args:
+            number: Number to look up (0-9999)
+            
+        Returns:
+            AtlasEntry with image, png and packed segments (None for parts not stored)
+        """
+        entry = self._entries.get(number)
+        with self._lock:
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
         
-        vert_end_y = int(y_pos - y_dir * symbol_size)
-        cv2.line(img, (horiz_end_x, y_pos), (horiz_end_x, vert_end_y), 0, thickness)
-        segments.append({"type": "vertical", "start": (horiz_end_x, y_pos), "end": (horiz_end_x, vert_end_y)})
+        entry = self._build_entry(number)
+        self._insert(number, entry)
+        return entry
+
+    def get_png(self, number):
+        """Return the PNG bytes of a glyph."""
+        entry = self.get(number)
+        if entry.png is not None:
+            return entry.png
+        return encode_image_to_png(entry.image)
+
+    def get_base64(self, number):
+        """Return a glyph as a base64 data URI, like number_to_cistercian_image."""
+        return png_to_base64(self.get_png(number))
+
+    def get_with_segments(self, number):
+        """Return a glyph in the same shape as number_to_cistercian_with_segments."""
+        entry = self.get(number)
+        return {
+            "image_data": png_to_base64(entry.png if entry.png is not None else encode_image_to_png(entry.image)),
+            "segments": unpack_segments(entry.segments)
+        }
+
+    def stats(self):
+        """Report the atlas configuration, memory use and lookup counters."""
+        with self._lock:
+            return {
+                "layout": self.layout,
+                "store": self.store,
+                "fill": self.fill_mode,
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejected": self.rejected
+            }
 
-    elif digit == 9:
-        horiz_end_x = int(center_x + x_dir * symbol_size)
-        vert_end_y = int(y_pos - y_dir * symbol_size)
+    def _build_entry(self, number):
+        img, segments = self._render(number, self.options)
+        img.setflags(write=False)
+        png = encode_image_to_png(img) if self.store in ("png", "both") else None
+        pixels = img if self.store in ("pixels", "both") else None
+        return AtlasEntry(pixels, png, pack_segments(segments) if segments is not None else None)
 
-        cv2.line(img, (center_x, y_pos), (horiz_end_x, y_pos), 0, thickness)
-        segments.append({"type": "horizontal", "start": (center_x, y_pos), "end": (horiz_end_x, y_pos)})
+    def _insert(self, number, entry):
+        size = _entry_nbytes(entry)
+        with self._lock:
+            if number in self._entries:
+                return True
+            if self.nbytes + size > self.max_bytes:
+                self.rejected += 1
+                return False
+            self._entries[number] = entry
+            self.nbytes += size
+        return True
+
+def _entry_nbytes(entry):
+    # Whole objects, headers included; getsizeof covers the buffer of an array owning its data
+    size = sys.getsizeof(entry)
+    for part in entry:
+        if part is None:
+            continue
+        size += sys.getsizeof(part)
+        if isinstance(part, np.ndarray) and part.base is not None:
+            size += part.nbytes
+    return size
+
+
+class LRUCache:
+    """
+    Thread-safe bounded least-recently-used cache with hit, miss and eviction counters.
+    
+    Values are computed outside the lock, so concurrent misses on the same key
+    may compute it twice, but never block lookups of other keys.
+    """
+
+    def __init__(self, maxsize=RENDER_CACHE_DEFAULT_SIZE):
+        if maxsize < 0:
+            raise ValueError("Cache size must not be negative")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
         
-        cv2.line(img, (horiz_end_x, y_pos), (horiz_end_x, vert_end_y), 0, thickness)
-        segments.append({"type": "vertical", "start": (horiz_end_x, y_pos), "end": (horiz_end_x, vert_end_y)})
+        value = compute()
         
-        cv2.line(img, (horiz_end_x, vert_end_y), (center_x, vert_end_y), 0, thickness)
-        segments.append({"type": "horizontal", "start": (horiz_end_x, vert_end_y), "end": (center_x, vert_end_y)})
+        with self._lock:
+            if self.maxsize == 0:
+                return value
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+        return value
+
+    def resize(self, maxsize):
+        """Change the capacity, evicting the least recently used entries if needed."""
+        if maxsize < 0:
+            raise ValueError("Cache size must not be negative")
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Report the cache size and lookup counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+    def _evict(self):
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+class FrozenDict(dict):
+    """Dictionary that rejects mutation, so cached results can be shared between threads."""
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("FrozenDict is immutable")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _immutable
+    __ior__ = _immutable
+
+    def __hash__(self):
+        return hash(tuple(self.items()))
+
+    def __reduce__(self):
+        # pickle and copy would otherwise rebuild the dict through __setitem__
+        return (FrozenDict, (dict(self),))
+
+def freeze(value):
+    """Recursively convert dicts to FrozenDict and lists to tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+render_cache = LRUCache()
+
+def configure_render_cache(maxsize):
+    """Resize the shared render cache; 0 disables caching."""
+    render_cache.resize(maxsize)
+
+def cached_number_to_cistercian_image(number, options=None):
+    """number_to_cistercian_image behind the shared LRU render cache."""
+    options = options or DEFAULT_RENDER_OPTIONS
+    return render_cache.get_or_compute(
+        ("image", number, options),
+        lambda: number_to_cistercian_image(number, options)
+    )
+
+def cached_number_to_cistercian_with_segments(number, options=None):
+    """
+    number_to_cistercian_with_segments behind the shared LRU render cache.
     
-    return segments
\ No newline at end of file
+    Returns:
+        Immutable result: a FrozenDict whose segment lists are tuples
+    """
+    options = options or DEFAULT_RENDER_OPTIONS
+    return render_cache.get_or_compute(
+        ("segments", number, options),
+        lambda: freeze(number_to_cistercian_with_segments(number, options))
+    )
@@ -0,0 +1,156 @@
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from cistercian_recognition import BATCH_PLANES, ENGINES
+from stage_timing import NULL_TIMER, StageTimer
+
+logger = logging.getLogger(__name__)
+
+def _warm_worker():
+    """Process initializer: import OpenCV/NumPy and build the digit templates once per worker."""
+    import cistercian_recognition
+    cistercian_recognition.build_digit_templates()
+
+def _recognize_shared(name, shape, dtype, engine, debug=False, timings=False):
+    from cistercian_recognition import recognize_cistercian_numeral
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        image = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        timer = StageTimer() if timings else NULL_TIMER
+        result = recognize_cistercian_numeral(image, engine=engine, debug=debug, timings=timer)
+        if timings:
+            result["timings"] = timer.as_dict()
+        del image
+        return result
+    finally:
+        shm.close()
+
+def _recognize_batch_shared(name, shape, dtype, engine):
+    from cistercian_recognition import recognize_batch
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        images = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        results = recognize_batch(images, engine=engine)
+        del images
+        return results
+    finally:
+        shm.close()
+
+class RecognitionExecutor:
+    """
+    Process pool for CPU-bound recognition with persistent, pre-warmed workers.
+    
+    Workers are spawned once, import OpenCV and NumPy and build the digit
+    templates up front, then serve requests until shutdown. Images travel
+    through shared memory blocks; only their name, shape and dtype are pickled.
+    
+    Spawned workers re-import the main script as __mp_main__, so its startup
+    should be skipped under that name, as app.py does.
+    
+    Args:
+        workers: Number of worker processes, defaults to the number of CPUs
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_warm_worker
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def submit(self, image, engine="heuristic", debug=False, timings=False):
+        """
+        Queue one image for recognize_cistercian_numeral.
+        
+        With debug, the overlay is returned in the result; a debug sink set
+        in this process is not called, since recognition runs in a worker.
+        With timings, the worker's stage timings are returned as result['timings'].
+        
+        Returns:
+            Future resolving to the recognition result dictionary
+        """
+        return self._submit(_recognize_shared, np.asarray(image), engine, debug, timings)
+
+    def recognize(self, image, engine="heuristic", debug=False, timings=False):
+        """Recognize one image in a worker and wait for the result."""
+        return self.submit(image, engine, debug, timings).result()
+
+    def recognize_many(self, images, engine="heuristic", chunk_size=BATCH_PLANES):
+        """
+        Recognize a stack of images, spreading chunks over all workers.
+        
+        Args:
+            images: Array of shape (N, H, W) or a sequence of equally sized images
+            engine: Recognition engine passed to recognize_batch
+            chunk_size: Images per task
+            
+        Returns:
+            List of result dictionaries, in input order
+        """
+        images = np.asarray(images)
+        futures = [
+            self._submit(_recognize_batch_shared, images[start:start + chunk_size], engine)
+            for start in range(0, len(images), chunk_size)
+        ]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def _submit(self, task, array, engine, *args):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown recognition engine: {engine}")
+        
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        
+        try:
+            future = self._pool.submit(task, shm.name, array.shape, array.dtype.str, engine, *args)
+        except Exception:
+            _release(shm)
+            raise
+        future.add_done_callback(lambda _: _release(shm))
+        return future
+
+def _release(shm):
+    shm.close()
+    shm.unlink()
+
+_default_executor = None
+_default_lock = threading.Lock()
+
+def get_recognition_executor(workers=None):
+    """
+    Return the process-wide RecognitionExecutor, starting it on first use.
+    
+    `workers` sizes the pool when it is started; later calls must pass None
+    or the same size, since the running pool is not resized.
+    """
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = RecognitionExecutor(workers)
+            atexit.register(_default_executor.shutdown)
+            logger.info(f"Started recognition pool with {_default_executor.workers} workers")
+        elif workers is not None and workers != _default_executor.workers:
+            raise ValueError(
+                f"Recognition pool already running with {_default_executor.workers} workers, not {workers}"
+            )
+        return _default_executor
@@ -0,0 +1,77 @@
+import time
+from contextlib import nullcontext
+from types import MappingProxyType
+
+class StageTimer:
+    """
+    Collects per-stage wall-clock timings for one request.
+
+    Stages are timed with the monotonic perf_counter; a stage entered more
+    than once accumulates. Pass NULL_TIMER instead when timings are not
+    wanted, so instrumented code needs no conditionals.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.timings = {}
+        self._start = time.perf_counter()
+
+    def stage(self, name):
+        """Context manager timing the enclosed block as stage `name`."""
+        return _Stage(self, name)
+
+    def add(self, name, ms):
+        """Record `ms` milliseconds against stage `name`."""
+        self.timings[name] = self.timings.get(name, 0.0) + ms
+
+    def total(self):
+        """Milliseconds since the timer was created."""
+        return (time.perf_counter() - self._start) * 1000
+
+    def as_dict(self, precision=3):
+        """Stage timings in milliseconds, in the order first recorded, plus 'total'."""
+        timings = {name: round(ms, precision) for name, ms in self.timings.items()}
+        timings["total"] = round(self.total(), precision)
+        return timings
+
+    def server_timing(self, timings=None):
+        """
+        Format the timings as a Server-Timing header value.
+        
+        Pass the dict already returned by as_dict() so the header agrees with
+        it; otherwise 'total' is read again.
+        """
+        timings = self.as_dict() if timings is None else timings
+        return ", ".join(f"{name};dur={ms}" for name, ms in timings.items())
+
+class _Stage:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timer.add(self.name, (time.perf_counter() - self.start) * 1000)
+
+class NullTimer:
+    """StageTimer stand-in that records nothing."""
+
+    enabled = False
+
+    # Always empty; read-only since the instance is shared
+    timings = MappingProxyType({})
+
+    _stage = nullcontext()
+
+    def stage(self, name):
+        return self._stage
+
+    def add(self, name, ms):
+        pass
+
+NULL_TIMER = NullTimer()
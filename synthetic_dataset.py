@@ -0,0 +1,211 @@
+"""
+Augmented synthetic Cistercian numerals for load and accuracy testing.
+
+Renders numerals with the renderer and degrades them like scans: rotation,
+perspective, scale, stroke-width jitter, blur, salt-and-pepper noise and
+JPEG artifacts. Every sample is seeded by (seed, index), so any slice of a
+dataset can be regenerated or produced in parallel and yields the same
+images. Datasets are written as sharded compressed .npz files:
+
+    python synthetic_dataset.py data/stress --count 1000000 --shard-size 5000 --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from cistercian_renderer import make_render_options, render_cistercian_image
+
+IMAGE_SIZE = (300, 400)
+
+# Maximum magnitude of each augmentation at strength 1.0
+AugmentParams = namedtuple('AugmentParams', [
+    'rotation',       # degrees, uniform in [-rotation, rotation]
+    'perspective',    # corner displacement as a fraction of the image size
+    'scale',          # relative zoom, uniform in [-scale, scale]
+    'thickness',      # stroke-width jitter in pixels around the default width
+    'salt_pepper',    # fraction of pixels flipped to black or white
+    'blur',           # Gaussian blur sigma, uniform in [0, blur]
+    'jpeg_quality'    # lowest JPEG quality, uniform in [jpeg_quality, 95]
+])
+
+DEFAULT_AUGMENT = AugmentParams(
+    rotation=8.0,
+    perspective=0.04,
+    scale=0.15,
+    thickness=2,
+    salt_pepper=0.01,
+    blur=1.2,
+    jpeg_quality=40
+)
+
+SHARD_PATTERN = "shard-{:05d}.npz"
+
+def sample_rng(seed, index):
+    """Random generator for one sample, independent of every other sample."""
+    return np.random.default_rng((seed, index))
+
+def synthesize(number, rng, params=DEFAULT_AUGMENT, strength=1.0):
+    """
+    Render one numeral and apply random scan-like degradations.
+
+    Args:
+        number: Number to render (0-9999)
+        rng: numpy Generator driving every random choice
+        params: AugmentParams with the maximum magnitudes
+        strength: Scales all magnitudes; 0 returns the clean rendering
+
+    Returns:
+        Grayscale uint8 image of IMAGE_SIZE
+    """
+    width, height = IMAGE_SIZE
+    if strength <= 0:
+        return render_cistercian_image(number)
+
+    default_thickness = max(1, round(3 * height / 400))
+    jitter = int(round(params.thickness * strength))
+    thickness = int(rng.integers(max(1, default_thickness - jitter), default_thickness + jitter + 1))
+    image = render_cistercian_image(number, options=make_render_options(width, height, thickness=thickness))
+
+    angle = rng.uniform(-params.rotation, params.rotation) * strength
+    scale = 1 + rng.uniform(-params.scale, params.scale) * strength
+    affine = np.vstack([cv2.getRotationMatrix2D((width / 2, height / 2), angle, scale), [0, 0, 1]])
+
+    corners = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    shift = rng.uniform(-1, 1, (4, 2)) * params.perspective * strength * (width, height)
+    perspective = cv2.getPerspectiveTransform(corners, np.float32(corners + shift))
+
+    image = cv2.warpPerspective(image, perspective @ affine, (width, height), borderValue=255)
+
+    sigma = rng.uniform(0, params.blur * strength)
+    if sigma > 0.1:
+        image = cv2.GaussianBlur(image, (0, 0), sigma)
+
+    flipped = rng.random(image.shape) < params.salt_pepper * strength
+    image[flipped] = rng.choice(np.array([0, 255], dtype=np.uint8), size=int(np.count_nonzero(flipped)))
+
+    low = 95 - (95 - params.jpeg_quality) * min(strength, 1.0)
+    quality = int(rng.uniform(low, 95))
+    _, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return cv2.imdecode(jpeg, cv2.IMREAD_GRAYSCALE)
+
+def generate_samples(count, seed=0, numbers=None, params=DEFAULT_AUGMENT, strength=1.0, start=0):
+    """
+    Lazily yield (image, label) pairs.
+
+    Args:
+        count: Number of samples
+        seed: Dataset seed
+        numbers: Labels to cycle through, or None for uniformly random labels
+        params: AugmentParams
+        strength: Augmentation strength
+        start: Index of the first sample, for producing a slice of a larger dataset
+
+    Yields:
+        (image, label) with a uint8 image and an int label
+    """
+    for index in range(start, start + count):
+        rng = sample_rng(seed, index)
+        if numbers is None:
+            label = int(rng.integers(0, 10000))
+        else:
+            label = int(numbers[index % len(numbers)])
+        yield synthesize(label, rng, params, strength), label
+
+def _write_shard(path, start, count, seed, numbers, params, strength):
+    width, height = IMAGE_SIZE
+    images = np.empty((count, height, width), dtype=np.uint8)
+    labels = np.empty(count, dtype=np.int16)
+    samples = generate_samples(count, seed, numbers, params, strength, start)
+    for i, (image, label) in enumerate(samples):
+        images[i] = image
+        labels[i] = label
+    np.savez_compressed(path, images=images, labels=labels, indices=np.arange(start, start + count))
+    return path
+
+def write_shards(out_dir, count, shard_size=1000, seed=0, numbers=None, params=DEFAULT_AUGMENT,
+                 strength=1.0, workers=1):
+    """
+    Generate a dataset as sharded compressed .npz files plus a manifest.json.
+
+    Each shard holds `images` (N, H, W) uint8, `labels` (N,) int16 and the
+    sample `indices`. Shards are independent, so they can be generated in
+    parallel and the result does not depend on `workers`.
+
+    Args:
+        out_dir: Output directory, created if missing
+        count: Total number of samples
+        shard_size: Samples per shard
+        seed, numbers, params, strength: As for generate_samples
+        workers: Processes generating shards in parallel
+
+    Returns:
+        List of shard paths
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [
+        (os.path.join(out_dir, SHARD_PATTERN.format(i)), start, min(shard_size, count - start),
+         seed, numbers, params, strength)
+        for i, start in enumerate(range(0, count, shard_size))
+    ]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(_write_shard, *zip(*jobs)))
+    else:
+        paths = [_write_shard(*job) for job in jobs]
+
+    manifest = {
+        "count": count,
+        "shard_size": shard_size,
+        "seed": seed,
+        "numbers": list(numbers) if numbers is not None else None,
+        "strength": strength,
+        "params": params._asdict(),
+        "image_size": IMAGE_SIZE,
+        "shards": [os.path.basename(path) for path in paths]
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return paths
+
+def load_shards(path):
+    """
+    Stream (image, label) pairs from a dataset directory written by write_shards.
+
+    Shards are read one at a time, so memory use is bounded by the shard size.
+    """
+    with open(os.path.join(path, "manifest.json")) as f:
+        shards = json.load(f)["shards"]
+    for name in shards:
+        with np.load(os.path.join(path, name)) as shard:
+            images, labels = shard["images"], shard["labels"]
+        for image, label in zip(images, labels):
+            yield image, int(label)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate an augmented synthetic Cistercian numeral dataset.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--shard-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--strength", type=float, default=1.0, help="Augmentation strength (0 = clean renderer output)")
+    parser.add_argument("--all-numerals", action="store_true", help="Cycle through 0-9999 instead of random labels")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    numbers = range(10000) if args.all_numerals else None
+    paths = write_shards(
+        args.out_dir, args.count, args.shard_size, args.seed, numbers,
+        strength=args.strength, workers=args.workers
+    )
+    print(f"Wrote {args.count} samples in {len(paths)} shards to {args.out_dir}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())